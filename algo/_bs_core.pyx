@@ -0,0 +1,81 @@
+# cython: language_level=3
+"""
+C implementation of the scalar Black-Scholes / Newton-Raphson IV hot path.
+Build in place with: python setup.py build_ext --inplace
+"""
+cimport cython
+from libc.math cimport log, sqrt, exp, erfc, fabs, M_PI
+
+cdef inline double _ncdf(double x) noexcept nogil:
+    # Standard normal CDF; erfc keeps precision in the negative tail
+    return 0.5 * erfc(-x / 1.4142135623730951)
+
+cdef inline double _npdf(double x) noexcept nogil:
+    return 0.3989422804014327 * exp(-0.5 * x * x)
+
+@cython.cdivision(True)
+cpdef double bs_price_erf(bint is_call, double S, double K, double t, double r, double sigma) noexcept nogil:
+    cdef double sqrt_t, d1, d2
+    # Clamp sigma to prevent overflow (max ~10 = 1000% IV)
+    sigma = min(max(sigma, 0.001), 10.0)
+    if t <= 0:
+        t = 0.0001
+    sqrt_t = sqrt(t)
+    d1 = (log(S / K) + (r + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    if is_call:
+        return S * _ncdf(d1) - K * exp(-r * t) * _ncdf(d2)
+    return K * exp(-r * t) * _ncdf(-d2) - S * _ncdf(-d1)
+
+@cython.cdivision(True)
+cdef inline double _iv_seed(double price, double S, double K, double t, double r, bint is_call) noexcept nogil:
+    # Corrado-Miller starting IV (Brenner-Subrahmanyam at the money), clamped to [0.01, 3.0]
+    cdef double disc_k = K * exp(-r * t)
+    cdef double gap = S - disc_k
+    cdef double half_gap = (price if is_call else price + gap) - 0.5 * gap
+    cdef double sigma = sqrt(2.0 * M_PI / t) / (S + disc_k) * (
+        half_gap + sqrt(max(half_gap * half_gap - gap * gap / M_PI, 0.0)))
+    return min(max(sigma, 0.01), 3.0)
+
+@cython.cdivision(True)
+cpdef double implied_vol(double price, double S, double K, double t, double r, bint is_call) noexcept nogil:
+    """Newton-Raphson IV; same rules as utils.calculate_implied_volatility."""
+    cdef double intrinsic, lower, upper, sigma, sqrt_t, d1, d2, disc, bs_price, diff, v
+    cdef int i
+    if t <= 0:
+        return 0.001
+    intrinsic = max(S - K, 0.0) if is_call else max(K - S, 0.0)
+    if price < intrinsic:
+        return 0.001
+
+    sqrt_t = sqrt(t)
+    disc = exp(-r * t)
+    # No-arbitrage bounds, as in utils.calculate_implied_volatility
+    if is_call:
+        lower = max(S - K * disc, 0.0)
+        upper = S
+    else:
+        lower = max(K * disc - S, 0.0)
+        upper = K * disc
+    if price <= lower:
+        return 0.001
+    if price >= upper:
+        return 10.0
+    sigma = _iv_seed(price, S, K, t, r, is_call)
+    for i in range(100):
+        # Price and vega from one shared d1/d2
+        d1 = (log(S / K) + (r + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        if is_call:
+            bs_price = S * _ncdf(d1) - K * disc * _ncdf(d2)
+        else:
+            bs_price = K * disc * _ncdf(-d2) - S * _ncdf(-d1)
+        diff = price - bs_price
+        if fabs(diff) < 1e-5:
+            return sigma
+        v = S * _npdf(d1) * sqrt_t
+        if v == 0:
+            break
+        # Clamp sigma during iterations to prevent overflow
+        sigma = min(max(sigma + diff / v, 0.001), 10.0)
+    return sigma
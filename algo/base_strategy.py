@@ -2,6 +2,20 @@ from abc import ABC, abstractmethod
 import json
 import os
 
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+
+    _loads = orjson.loads
+except ImportError:
+    # Fall back to stdlib json
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode()
+
+    _loads = json.loads
+
 class BaseStrategy(ABC):
     def __init__(self, name):
         self.name = name
@@ -31,8 +45,13 @@ class BaseStrategy(ABC):
         Saves current state to persistent storage.
         """
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(state_dict, f, indent=4)
+            # Write out-of-place and rename so a crash never leaves a torn file
+            tmp = self.state_file + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(_dumps(state_dict))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.state_file)
         except Exception as e:
             print(f"Error saving state for {self.name}: {e}")
 
@@ -42,8 +61,8 @@ class BaseStrategy(ABC):
         """
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    return _loads(f.read())
             except Exception as e:
                 print(f"Error loading state for {self.name}: {e}")
         return None
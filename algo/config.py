@@ -84,6 +84,8 @@ MIN_REQUIRED_CASH = 50000 # Minimum free cash buffer required to run
 ROLLOVER_WEEKDAY = 0       # 0=Monday, 4=Friday (Friday is safer for gaps)
 AUTO_EXIT_BEFORE_MONTHLY_EXPIRY_3PM = True # Exit everything at 3 PM ONE DAY BEFORE Monthly Expiry
 POLL_INTERVAL_SECONDS = 30
+USE_MARKET_FEED = False # Stream LTPs over the Upstox WebSocket; REST quotes are the fallback. Off until verified on a live session
+USE_HTTP2_TRANSPORT = False # Send REST calls (incl. orders) over httpx HTTP/2 instead of the SDK; needs httpx[http2]
 ORDER_QUANTITY = 75 # 1 Lot for Nifty
 ORDER_PRODUCT = 'D' # Delivery (D) or Intraday (I)
 ORDER_VALIDITY = 'DAY'
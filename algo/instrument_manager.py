@@ -1,4 +1,5 @@
 import pandas as pd
+import glob
 import gzip
 import shutil
 import requests
@@ -16,7 +17,11 @@ class InstrumentMaster:
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
         self.json_path = os.path.join(data_dir, 'NSE_FO.json')
+        # Parsed master pickled once per day so later starts skip the JSON parse
+        self.pickle_path = os.path.join(data_dir, f"NSE_FO_{date.today():%Y%m%d}.pkl")
         self.df = None
+        self.key_index = {} # (name, expiry_dt, strike, 'CE'/'PE') -> instrument_key
+        self.contract_index = {} # instrument_key -> (name, expiry_dt, strike, 'CE'/'PE')
 
     def download_master(self):
         """Downloads and extracts the NSE FO instrument master file."""
@@ -41,6 +46,9 @@ class InstrumentMaster:
             print(f"Error downloading master: {e}")
 
     def load_master(self):
+        if self._load_pickle():
+            return
+
         if not os.path.exists(self.json_path):
             self.download_master()
         
@@ -63,6 +71,62 @@ class InstrumentMaster:
                      
         except Exception as e:
             print(f"Error loading master JSON: {e}")
+            return
+
+        self._save_pickle()
+        self._build_key_index()
+
+    def _load_pickle(self):
+        """Loads today's parsed master if it is at least as new as the JSON it came from."""
+        if not os.path.exists(self.pickle_path):
+            return False
+        if os.path.exists(self.json_path) and os.path.getmtime(self.json_path) > os.path.getmtime(self.pickle_path):
+            return False
+        try:
+            self.df = pd.read_pickle(self.pickle_path)
+        except Exception as e:
+            print(f"Error loading master pickle: {e}")
+            return False
+        self._build_key_index()
+        return True
+
+    def _save_pickle(self):
+        try:
+            # Only the current day's pickle is kept
+            for old in glob.glob(os.path.join(self.data_dir, 'NSE_FO_*.pkl')):
+                if old != self.pickle_path:
+                    os.remove(old)
+            self.df.to_pickle(self.pickle_path)
+        except Exception as e:
+            print(f"Error saving master pickle: {e}")
+
+    def _build_key_index(self):
+        """Builds the (name, expiry, strike, type) <-> instrument_key dicts for O(1) option lookups."""
+        self.key_index = {}
+        self.contract_index = {}
+        if self.df is None or 'instrument_type' not in self.df.columns:
+            return
+        opts = self.df[self.df['instrument_type'].isin(['CE', 'PE'])]
+        strike_col = 'strike' if 'strike' in opts.columns else 'strike_price'
+        if strike_col not in opts.columns:
+            return
+        self.key_index = dict(zip(
+            zip(opts['name'], opts['expiry_dt'], opts[strike_col].astype(float), opts['instrument_type']),
+            opts['instrument_key']
+        ))
+        self.contract_index = {key: contract for contract, key in self.key_index.items()}
+
+    def get_instrument_key(self, underlying_symbol, expiry_date, strike, option_type):
+        """Instrument key for one option contract, or None if it is not in the master."""
+        if self.df is None:
+            self.load_master()
+        return self.key_index.get((underlying_symbol, expiry_date, float(strike), option_type))
+
+    def get_contract(self, instrument_key):
+        """(name, expiry_dt, strike, 'CE'/'PE') for an option instrument_key, or None if it is not in the master."""
+        if self.df is None:
+            self.load_master()
+        return self.contract_index.get(instrument_key)
 
     def get_expiry_dates(self, underlying_symbol='NIFTY'):
         if self.df is None:
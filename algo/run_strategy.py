@@ -1,13 +1,15 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
 import time
 from datetime import datetime, date, timedelta
-from upstox_wrapper import UpstoxWrapper
+from upstox_wrapper import UpstoxWrapper, UpstoxAuthError
 from instrument_manager import InstrumentMaster
 from strategy import CalendarPEWeekly, WeeklyIronfly
 import config
 from greeks import calculate_delta
-from utils import calculate_implied_volatility
+from utils import calculate_implied_volatility_vec_cached
 from event_monitor import print_event_summary
 from colorama import Fore, Style
 
@@ -177,7 +179,7 @@ def main():
                 # WeeklyIronfly style
                 if hasattr(strat, 'positions') and strat.positions:
                    for pos in strat.positions:
-                       all_keys.append(pos['instrument_key'])
+                       all_keys.append(pos.instrument_key)
             
             all_keys = list(set(all_keys))
 
@@ -188,27 +190,25 @@ def main():
                     pos = getattr(strat, pos_attr, None)
                     # We check if expiry_dt is missing OR is a float (the old 'expiry' field format)
                     if pos and (not pos.get('expiry_dt') or pos.get('expiry_dt') == 'N/A' or isinstance(pos.get('expiry_dt'), float)):
-                        key = pos['instrument_key']
-                        match = master.df[master.df['instrument_key'] == key]
-                        if not match.empty:
-                            row = match.iloc[0]
-                            pos['expiry_dt'] = str(row['expiry_dt'])
-                            if 'type' not in pos: pos['type'] = row['instrument_type'].lower()
-                            if 'strike' not in pos: pos['strike'] = float(row['strike'])
+                        contract = master.get_contract(pos['instrument_key'])
+                        if contract:
+                            _, expiry_dt, strike, inst_type = contract
+                            pos['expiry_dt'] = str(expiry_dt)
+                            if 'type' not in pos: pos['type'] = inst_type.lower()
+                            if 'strike' not in pos: pos['strike'] = strike
                             strat.save_state()
 
                 # WeeklyIronfly style
                 if hasattr(strat, 'positions') and strat.positions:
                    changed = False
                    for pos in strat.positions:
-                       if not pos.get('expiry_dt') or pos.get('expiry_dt') == 'N/A':
-                            key = pos['instrument_key']
-                            match = master.df[master.df['instrument_key'] == key]
-                            if not match.empty:
-                                row = match.iloc[0]
-                                pos['expiry_dt'] = str(row['expiry_dt'])
-                                if 'type' not in pos: pos['type'] = row['instrument_type']
-                                if 'strike' not in pos: pos['strike'] = float(row['strike'])
+                       if not pos.expiry_dt or pos.expiry_dt == 'N/A':
+                            contract = master.get_contract(pos.instrument_key)
+                            if contract:
+                                _, expiry_dt, strike, inst_type = contract
+                                pos.expiry_dt = str(expiry_dt)
+                                if pos.type is None: pos.type = inst_type
+                                if pos.strike is None: pos.strike = strike
                                 changed = True
                    if changed:
                        strat.save_state()
@@ -216,6 +216,9 @@ def main():
             if len(all_keys) > 100:
                 print(f"{Fore.YELLOW}WARNING: Requesting high number of symbols ({len(all_keys)}). Possible rate limit risk.{Style.RESET_ALL}")
             
+            if config.USE_MARKET_FEED:
+                # Syncs the subscription to this loop's keys; rolled-off strikes are unsubscribed
+                api.start_feed([config.SPOT_INSTRUMENT_KEY] + all_keys)
             quotes = api.get_option_chain_quotes(all_keys)
             
             # Helper to package chain data
@@ -225,16 +228,24 @@ def main():
                 for df, opt_type in [(pe_df, 'p'), (ce_df, 'c')]:
                     # Optimization: only look at keys we actually fetched
                     df_relevant = df[df['instrument_key'].isin(q_dict.keys())]
-                    for _, row in df_relevant.iterrows():
-                        key = row['instrument_key']
-                        ltp = q_dict[key].last_price
-                        tte = (datetime.combine(row['expiry_dt'], datetime.min.time()) - t_now).total_seconds() / (365*24*3600)
-                        if tte <= 0: tte = 0.0001
+                    if df_relevant.empty:
+                        continue
+                    keys = df_relevant['instrument_key'].tolist()
+                    strikes = df_relevant['strike'].tolist()
+                    expiries = df_relevant['expiry_dt'].tolist()
+                    ltps = [q_dict[key].last_price for key in keys]
+                    ttes = np.array([(datetime.combine(e, datetime.min.time()) - t_now).total_seconds() / (365*24*3600)
+                                     for e in expiries])
+                    ttes[ttes <= 0] = 0.0001
+                    # One vectorized solve per expiry/side; strikes whose LTP has not moved come from the IV cache
+                    ivs = calculate_implied_volatility_vec_cached(keys, ltps, spot, strikes, ttes,
+                                                                  config.RISK_FREE_RATE if hasattr(config, 'RISK_FREE_RATE') else 0.05, opt_type)
+                    for key, strike, expiry, ltp, tte, iv in zip(keys, strikes, expiries, ltps, ttes.tolist(), ivs.tolist()):
                         chain.append({
-                            'strike': row['strike'],
-                            'iv': calculate_implied_volatility(ltp, spot, row['strike'], tte, config.RISK_FREE_RATE if hasattr(config, 'RISK_FREE_RATE') else 0.05, opt_type),
+                            'strike': strike,
+                            'iv': iv,
                             'time_to_expiry': tte,
-                            'expiry_dt': row['expiry_dt'].strftime('%Y-%m-%d'),
+                            'expiry_dt': expiry.strftime('%Y-%m-%d'),
                             'instrument_key': key,
                             'ltp': ltp,
                             'type': opt_type
@@ -292,6 +303,15 @@ def main():
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}Algo stopping manually...{Style.RESET_ALL}")
         # Option to exit all on manual stop could be added here
+    except UpstoxAuthError as e:
+        # Token expired/revoked: no further API call can succeed, so persist positions and stop.
+        # Journals drain their queued rows via atexit on the way out.
+        print(f"\n{Fore.RED}CRITICAL: {e} Saving state and stopping...{Style.RESET_ALL}")
+        for strat in active_strategies:
+            strat.save_state()
+        sys.exit(1)
+    finally:
+        api.stop_feed()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,9 @@
+# Optional C extension for the IV hot path; utils.py falls back to Python/Numba without it.
+# Build in place with: python setup.py build_ext --inplace
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='algo-bs-core',
+    ext_modules=cythonize('_bs_core.pyx', compiler_directives={'language_level': 3}),
+)
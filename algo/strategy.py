@@ -1,5 +1,8 @@
 import config
+import numpy as np
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
+from typing import Optional
 from greeks import calculate_delta, get_atm_strike
 from colorama import init, Fore, Style
 from trade_logger import TradeJournal
@@ -9,6 +12,9 @@ import re
 # Initialize colorama for Windows support
 init(autoreset=True)
 
+# Color codes bound once so per-tick logging avoids repeated attribute lookups
+_R, _G, _Y, _C, _RST = Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.CYAN, Style.RESET_ALL
+
 class CalendarPEWeekly(BaseStrategy):
     def __init__(self, risk_free_rate=config.RISK_FREE_RATE):
         super().__init__("CalendarPEWeekly")
@@ -161,10 +167,10 @@ class CalendarPEWeekly(BaseStrategy):
         m_ltp = None
         if self.weekly_position:
             obj = quotes.get(self.weekly_position['instrument_key'])
-            w_ltp = getattr(obj, 'last_price', None) if obj else None
+            w_ltp = obj.last_price if obj is not None else None
         if self.monthly_position:
             obj = quotes.get(self.monthly_position['instrument_key'])
-            m_ltp = getattr(obj, 'last_price', None) if obj else None
+            m_ltp = obj.last_price if obj is not None else None
 
         if not has_acted and self.check_portfolio_risk(w_ltp, m_ltp, order_callback):
             has_acted = True
@@ -531,17 +537,37 @@ class CalendarPEWeekly(BaseStrategy):
                 return True
         return False
 
+@dataclass(slots=True)
+class Position:
+    """A single WeeklyIronfly leg. Slotted to keep long-lived position lists compact."""
+    instrument_key: str
+    qty: int
+    side: str
+    entry_price: float
+    strike: Optional[float] = None
+    type: Optional[str] = None
+    tag: str = ''
+    expiry_dt: str = 'N/A'
+
+    @classmethod
+    def from_dict(cls, d):
+        """Builds a Position from a saved state dict, ignoring unknown keys."""
+        return cls(**{k: v for k, v in d.items() if k in cls.__dataclass_fields__})
+
 class WeeklyIronfly(BaseStrategy):
     def __init__(self, risk_free_rate=config.RISK_FREE_RATE):
         super().__init__("WeeklyIronfly")
-        self.positions = [] # List of {'instrument_key': ..., 'qty': ..., 'side': ..., 'entry_price': ...}
+        self.positions = [] # List of Position
+        self._position_by_tag = {} # tag -> index into self.positions
+        self._pnl_legs = () # (instrument_key, entry_price, signed_qty) per position, see _reindex_positions
         self.is_adjusted = False
         self.risk_free_rate = risk_free_rate
         self.journal = TradeJournal(filename="trade_log_ironfly.csv")
+        self._last_quote_hash = None # Fingerprint of held-leg LTPs from the previous tick
 
     def log(self, message):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        colored_message = message.replace("SOLD", f"{Fore.RED}SOLD{Style.RESET_ALL}").replace("BOUGHT", f"{Fore.GREEN}BOUGHT{Style.RESET_ALL}")
+        colored_message = message.replace("SOLD", f"{_R}SOLD{_RST}").replace("BOUGHT", f"{_G}BOUGHT{_RST}")
         entry = f"[{timestamp}] [{self.name}] {colored_message}"
         print(entry)
 
@@ -557,15 +583,24 @@ class WeeklyIronfly(BaseStrategy):
 
         if not spot_price: return
 
+        # Resolve config once per tick
+        trading_mode = config.TRADING_MODE
+        capital = config.IRONFLY_CAPITAL
+        target_pct = config.IRONFLY_TARGET_PERCENT
+        sl_pct = config.IRONFLY_SL_PERCENT
+        entry_weekday = config.IRONFLY_ENTRY_WEEKDAY
+        entry_time = config.IRONFLY_ENTRY_TIME
+        exit_time = config.IRONFLY_EXIT_TIME
+
         # Recovery: Ensure all positions have expiry_dt
         if self.positions:
             for pos in self.positions:
-                if not pos.get('expiry_dt') or pos.get('expiry_dt') == 'N/A':
+                if not pos.expiry_dt or pos.expiry_dt == 'N/A':
                     # Try to find in any of the chains
                     for chain in [cw_chain, nw_chain, m_chain]:
-                        match = next((x for x in chain if x['instrument_key'] == pos['instrument_key']), None)
+                        match = next((x for x in chain if x['instrument_key'] == pos.instrument_key), None)
                         if match:
-                            pos['expiry_dt'] = match['expiry_dt']
+                            pos.expiry_dt = match['expiry_dt']
                             break
 
         # Auto-Cleanup for Expired Positions
@@ -573,13 +608,14 @@ class WeeklyIronfly(BaseStrategy):
             today_str = now.strftime("%Y-%m-%d")
             valid_positions = []
             for pos in self.positions:
-                if pos.get('expiry_dt') and pos['expiry_dt'] < today_str:
-                    self.log(f"{Fore.RED}AUTO-CLEANUP: Ironfly leg {pos.get('strike')} {pos.get('type')} expired on {pos['expiry_dt']}. Clearing.{Style.RESET_ALL}")
+                if pos.expiry_dt and pos.expiry_dt < today_str:
+                    self.log(f"{_R}AUTO-CLEANUP: Ironfly leg {pos.strike} {pos.type} expired on {pos.expiry_dt}. Clearing.{_RST}")
                 else:
                     valid_positions.append(pos)
             
             if len(valid_positions) < len(self.positions):
                 self.positions = valid_positions
+                self._reindex_positions()
                 self.save_state()
 
         has_acted = False
@@ -588,9 +624,10 @@ class WeeklyIronfly(BaseStrategy):
         if self.positions:
             is_pos_expiry_today = False
             # Check if Leg 2 (Main short) is expiring today
-            leg2 = next((p for p in self.positions if 'IF_LEG2' in p.get('tag', '')), None)
-            if leg2:
-                 q = quotes.get(leg2['instrument_key'])
+            leg2_idx = self._position_by_tag.get('IF_LEG2')
+            if leg2_idx is not None:
+                 leg2 = self.positions[leg2_idx]
+                 q = quotes.get(leg2.instrument_key)
                  # In a real environment, we'd check expiry_dt from master, 
                  # but here we can check if tte is very low in cw_chain
                  # For simplicity, we assume market_data.is_expiry_today refers to Nifty standard expiries
@@ -598,7 +635,7 @@ class WeeklyIronfly(BaseStrategy):
                      # If we are in nw_chain week, market_data.is_expiry_today is True
                      is_pos_expiry_today = True
 
-            if is_pos_expiry_today and now.strftime("%H:%M") >= config.IRONFLY_EXIT_TIME:
+            if is_pos_expiry_today and now.strftime("%H:%M") >= exit_time:
                 self.log("EXPIRY EXIT: Target week expiry reached. Squaring off all.")
                 self.exit_all_positions(order_callback, reason="EXPIRY_TIME_EXIT")
                 has_acted = True
@@ -607,7 +644,7 @@ class WeeklyIronfly(BaseStrategy):
 
         # 2. Check Entry Timing (Current week's expiry at 12:00 PM for NEXT week's expiry)
         if not self.positions:
-            is_paper = config.TRADING_MODE == 'PAPER'
+            is_paper = trading_mode == 'PAPER'
             expiry_skipped = market_data.get('expiry_skipped', False)
             
             # In LIVE mode, check if today is current week's expiry (to enter for next week)
@@ -621,14 +658,14 @@ class WeeklyIronfly(BaseStrategy):
                     current_weekly_expiry = datetime.strptime(current_weekly_expiry_str, '%Y-%m-%d').date()
                     is_entry_day = (now.date() == current_weekly_expiry)
                 except:
-                    is_entry_day = (now.weekday() == config.IRONFLY_ENTRY_WEEKDAY)
+                    is_entry_day = (now.weekday() == entry_weekday)
             else:
-                is_entry_day = (now.weekday() == config.IRONFLY_ENTRY_WEEKDAY)
+                is_entry_day = (now.weekday() == entry_weekday)
             
             if nw_chain:
                 next_weekly_expiry_str = nw_chain[0].get('expiry_dt', 'N/A')
             
-            is_entry_time = now.strftime("%H:%M") >= config.IRONFLY_ENTRY_TIME
+            is_entry_time = now.strftime("%H:%M") >= entry_time
             
             # If we skipped today's expiry, the main weekly (cw_chain) is already the next contract.
             # We allow entry immediately as today IS technically an expiry day (just the skipped one).
@@ -640,38 +677,48 @@ class WeeklyIronfly(BaseStrategy):
                 self.save_state()
             else:
                 if now.second < 10 and now.minute % 5 == 0: # Log every 5 mins in the first 10s
-                    if config.TRADING_MODE == 'LIVE':
-                        self.log(f"{Fore.YELLOW}[LIVE MODE] WAITING: Entry allowed on current weekly expiry ({current_weekly_expiry_str}) at {config.IRONFLY_ENTRY_TIME} for next week ({next_weekly_expiry_str}). Today is {now.strftime('%Y-%m-%d %H:%M')}.{Style.RESET_ALL}")
+                    if trading_mode == 'LIVE':
+                        self.log(f"{_Y}[LIVE MODE] WAITING: Entry allowed on current weekly expiry ({current_weekly_expiry_str}) at {entry_time} for next week ({next_weekly_expiry_str}). Today is {now.strftime('%Y-%m-%d %H:%M')}.{_RST}")
                     else:
-                        self.log(f"WAITING: Entry window opens at {config.IRONFLY_ENTRY_TIME}")
+                        self.log(f"WAITING: Entry window opens at {entry_time}")
 
         # 3. Monitor PNL and Adjustments
         if not has_acted and self.positions:
+            # Skip the whole block if none of our legs ticked since the last cycle.
+            # can_adjust is part of the fingerprint so a pending adjustment still fires on the next candle.
+            can_adjust = market_data.get('can_adjust', True)
+            ltps = []
+            for pos in self.positions:
+                q = quotes.get(pos.instrument_key)
+                ltps.append(q.last_price if q is not None else None)
+            quote_hash = hash((can_adjust, tuple(zip((pos.instrument_key for pos in self.positions), ltps))))
+            if quote_hash == self._last_quote_hash:
+                return
+            self._last_quote_hash = quote_hash
+
             total_pnl = self.calculate_total_pnl(quotes)
-            pnl_pct = total_pnl / config.IRONFLY_CAPITAL
+            pnl_pct = total_pnl / capital
             
             # PnL Summary Logging
             strategy_state = {
                 'positions': []
             }
-            for pos in self.positions:
-                q = quotes.get(pos['instrument_key'])
-                ltp = getattr(q, 'last_price', None) if q else None
-                strategy_state['positions'].append({**pos, 'ltp': ltp})
+            for pos, ltp in zip(self.positions, ltps):
+                strategy_state['positions'].append({**asdict(pos), 'ltp': ltp})
             
             self.journal.print_summary(total_pnl, strategy_state)
 
             # Target Hit
-            if pnl_pct >= config.IRONFLY_TARGET_PERCENT:
+            if pnl_pct >= target_pct:
                 self.log(f"TARGET HIT: {pnl_pct*100:.2f}% profit. Exiting.")
                 self.exit_all_positions(order_callback, reason="TARGET_HIT")
                 has_acted = True
                 self.save_state()
             
             # SL / Adjustment Trigger
-            elif pnl_pct <= -config.IRONFLY_SL_PERCENT:
+            elif pnl_pct <= -sl_pct:
                 if not self.is_adjusted:
-                    if market_data.get('can_adjust', True):
+                    if can_adjust:
                         self.log(f"ADJUSTMENT TRIGGER: {pnl_pct*100:.2f}% loss. Building Call Calendar.")
                         self.apply_adjustment(spot_price, nw_chain, cw_chain, order_callback)
                         has_acted = True
@@ -691,23 +738,25 @@ class WeeklyIronfly(BaseStrategy):
         - Sell 2 Puts at ATM-250  
         - Buy 1 Put at ATM-450
         """
+        order_qty = config.ORDER_QUANTITY
         atm = round(spot / 50) * 50
-        strikes = [
-            atm + config.IRONFLY_LEG1_OFFSET,  # ATM-50
-            atm + config.IRONFLY_LEG2_OFFSET,  # ATM-250
-            atm + config.IRONFLY_LEG3_OFFSET   # ATM-450
-        ]
+        strikes = atm + np.array([
+            config.IRONFLY_LEG1_OFFSET,  # ATM-50
+            config.IRONFLY_LEG2_OFFSET,  # ATM-250
+            config.IRONFLY_LEG3_OFFSET   # ATM-450
+        ], dtype=np.int32)
         sides = ['BUY', 'SELL', 'BUY']
-        qtys = [config.ORDER_QUANTITY, config.ORDER_QUANTITY * 2, config.ORDER_QUANTITY]
+        qtys = [order_qty, order_qty * 2, order_qty]
         tags = ['IF_LEG1', 'IF_LEG2', 'IF_LEG3']
 
         self.log(f"Constructing Put Butterfly @ Spot {spot:.2f} | ATM: {atm}")
         self.log(f"Target Strikes: Leg1={strikes[0]} (Buy 1), Leg2={strikes[1]} (Sell 2), Leg3={strikes[2]} (Buy 1)")
         
         # ATOMIC CHECK: Verify all legs exist in chain before placing any orders
+        chain_idx = self._index_chain(weekly_chain)
         legs_data = []
-        for i, strike in enumerate(strikes):
-            opt = next((x for x in weekly_chain if x['strike'] == strike and x['type'] == 'p'), None)
+        for i, strike in enumerate(strikes.tolist()):
+            opt = chain_idx.get((strike, 'p'))
             if not opt:
                 self.log(f"ERROR: Cannot find Put option for Leg {i+1} at strike {strike}. Aborting entry.")
                 return
@@ -720,24 +769,25 @@ class WeeklyIronfly(BaseStrategy):
             resp = order_callback(opt['instrument_key'], qty, side, tag, expiry=opt.get('expiry_dt'))
             if resp and resp.get('status') == 'success':
                 price = resp.get('avg_price', opt.get('ltp', 0))
-                self.positions.append({
-                    'instrument_key': opt['instrument_key'],
-                    'qty': qty,
-                    'side': side,
-                    'entry_price': price,
-                    'strike': opt['strike'],
-                    'type': 'PE',
-                    'tag': tag,
-                    'expiry_dt': opt.get('expiry_dt', 'N/A')  # Add expiry date
-                })
+                self.positions.append(Position(
+                    instrument_key=opt['instrument_key'],
+                    qty=qty,
+                    side=side,
+                    entry_price=price,
+                    strike=opt['strike'],
+                    type='PE',
+                    tag=tag,
+                    expiry_dt=opt.get('expiry_dt', 'N/A')  # Add expiry date
+                ))
                 self.journal.log_trade(opt['instrument_key'], side, qty, price, tag, expiry=opt.get('expiry_dt'))
             else:
                 self.log(f"CRITICAL ERROR: Leg {i+1} order failed. Strategy may be incomplete!")
         
+        self._reindex_positions()
         if len(self.positions) == 3:
-            self.log(f"{Fore.GREEN}Put Butterfly construction COMPLETE.{Style.RESET_ALL}")
+            self.log(f"{_G}Put Butterfly construction COMPLETE.{_RST}")
         else:
-            self.log(f"{Fore.RED}WARNING: Only {len(self.positions)}/3 legs executed!{Style.RESET_ALL}")
+            self.log(f"{_R}WARNING: Only {len(self.positions)}/3 legs executed!{_RST}")
 
     def apply_adjustment(self, spot, current_week_chain, next_week_chain, order_callback):
         """
@@ -754,26 +804,29 @@ class WeeklyIronfly(BaseStrategy):
         """
         # Check if next week data is available
         if not next_week_chain or len(next_week_chain) == 0:
-            self.log(f"{Fore.RED}ERROR: Next week option data not available for adjustment. Skipping.{Style.RESET_ALL}")
+            self.log(f"{_R}ERROR: Next week option data not available for adjustment. Skipping.{_RST}")
             return
         
         # Move 100 points inward (higher strike for Puts) from Leg 1
-        leg1 = next((p for p in self.positions if 'IF_LEG1' in p.get('tag', '')), None)
-        if not leg1: 
+        leg1_idx = self._position_by_tag.get('IF_LEG1')
+        if leg1_idx is not None:
+            leg1 = self.positions[leg1_idx]
+        else:
             # Fallback if tags missing
             leg1 = self.positions[0] if self.positions else None
         
         if not leg1: return
 
-        adj_strike = leg1['strike'] + config.IRONFLY_ADJ_INWARD_OFFSET
+        order_qty = config.ORDER_QUANTITY
+        adj_strike = leg1.strike + config.IRONFLY_ADJ_INWARD_OFFSET
         
-        self.log(f"Adjustment: Leg 1 strike = {leg1['strike']}, Moving +100 inward → {adj_strike}")
+        self.log(f"Adjustment: Leg 1 strike = {leg1.strike}, Moving +100 inward → {adj_strike}")
         
         # Find Call options at adjustment strike
         # Sell: Same expiry as butterfly (current_week_chain)
         # Buy: Next week's expiry (next_week_chain)
-        ce_this_week = next((x for x in current_week_chain if x['strike'] == adj_strike and x['type'] == 'c'), None)
-        ce_next_week = next((x for x in next_week_chain if x['strike'] == adj_strike and x['type'] == 'c'), None)
+        ce_this_week = self._index_chain(current_week_chain).get((int(adj_strike), 'c'))
+        ce_next_week = self._index_chain(next_week_chain).get((int(adj_strike), 'c'))
 
         if ce_this_week and ce_next_week:
             self.log(f"Executing Call Calendar @ Strike {adj_strike}")
@@ -781,38 +834,39 @@ class WeeklyIronfly(BaseStrategy):
             self.log(f"  → Buy CE {adj_strike} (Next Week)")
             
             # Sell This Week CE
-            resp_w = order_callback(ce_this_week['instrument_key'], config.ORDER_QUANTITY, 'SELL', 'IF_ADJ_CE_SHORT', expiry=ce_this_week.get('expiry_dt'))
+            resp_w = order_callback(ce_this_week['instrument_key'], order_qty, 'SELL', 'IF_ADJ_CE_SHORT', expiry=ce_this_week.get('expiry_dt'))
             # Buy Next Week CE
-            resp_n = order_callback(ce_next_week['instrument_key'], config.ORDER_QUANTITY, 'BUY', 'IF_ADJ_CE_LONG', expiry=ce_next_week.get('expiry_dt'))
+            resp_n = order_callback(ce_next_week['instrument_key'], order_qty, 'BUY', 'IF_ADJ_CE_LONG', expiry=ce_next_week.get('expiry_dt'))
             
             if resp_w and resp_w.get('status') == 'success':
                 price_w = resp_w.get('avg_price', ce_this_week.get('ltp', 0))
-                self.positions.append({
-                    'instrument_key': ce_this_week['instrument_key'],
-                    'qty': config.ORDER_QUANTITY,
-                    'side': 'SELL',
-                    'entry_price': price_w,
-                    'strike': adj_strike,
-                    'type': 'CE',
-                    'tag': 'IF_ADJ_CE_SHORT',
-                    'expiry_dt': ce_this_week.get('expiry_dt', 'N/A')
-                })
-                self.journal.log_trade(ce_this_week['instrument_key'], 'SELL', config.ORDER_QUANTITY, price_w, 'IF_ADJ_CE_SHORT', expiry=ce_this_week.get('expiry_dt'))
+                self.positions.append(Position(
+                    instrument_key=ce_this_week['instrument_key'],
+                    qty=order_qty,
+                    side='SELL',
+                    entry_price=price_w,
+                    strike=adj_strike,
+                    type='CE',
+                    tag='IF_ADJ_CE_SHORT',
+                    expiry_dt=ce_this_week.get('expiry_dt', 'N/A')
+                ))
+                self.journal.log_trade(ce_this_week['instrument_key'], 'SELL', order_qty, price_w, 'IF_ADJ_CE_SHORT', expiry=ce_this_week.get('expiry_dt'))
             
             if resp_n and resp_n.get('status') == 'success':
                 price_n = resp_n.get('avg_price', ce_next_week.get('ltp', 0))
-                self.positions.append({
-                    'instrument_key': ce_next_week['instrument_key'],
-                    'qty': config.ORDER_QUANTITY,
-                    'side': 'BUY',
-                    'entry_price': price_n,
-                    'strike': adj_strike,
-                    'type': 'CE',
-                    'tag': 'IF_ADJ_CE_LONG',
-                    'expiry_dt': ce_next_week.get('expiry_dt', 'N/A')
-                })
-                self.journal.log_trade(ce_next_week['instrument_key'], 'BUY', config.ORDER_QUANTITY, price_n, 'IF_ADJ_CE_LONG', expiry=ce_next_week.get('expiry_dt'))
+                self.positions.append(Position(
+                    instrument_key=ce_next_week['instrument_key'],
+                    qty=order_qty,
+                    side='BUY',
+                    entry_price=price_n,
+                    strike=adj_strike,
+                    type='CE',
+                    tag='IF_ADJ_CE_LONG',
+                    expiry_dt=ce_next_week.get('expiry_dt', 'N/A')
+                ))
+                self.journal.log_trade(ce_next_week['instrument_key'], 'BUY', order_qty, price_n, 'IF_ADJ_CE_LONG', expiry=ce_next_week.get('expiry_dt'))
             
+            self._reindex_positions()
             self.is_adjusted = True
             self.log("Call Calendar Adjustment deployed.")
         else:
@@ -822,38 +876,51 @@ class WeeklyIronfly(BaseStrategy):
             if not ce_next_week:
                 self.log(f"  Missing: CE {adj_strike} (Next Week)")
 
+    def _reindex_positions(self):
+        """Rebuilds the tag -> position index and PnL legs. Call after any change to self.positions."""
+        self._position_by_tag = {pos.tag: i for i, pos in enumerate(self.positions)}
+        # Side is folded into the quantity sign so PnL per leg is a single multiply-add
+        self._pnl_legs = tuple(
+            (pos.instrument_key, pos.entry_price, pos.qty if pos.side == 'BUY' else -pos.qty)
+            for pos in self.positions
+        )
+
+    @staticmethod
+    def _index_chain(chain):
+        """Maps (strike, type) -> option dict for O(1) leg lookups."""
+        return {(int(x['strike']), x['type']): x for x in chain}
+
     def calculate_total_pnl(self, quotes):
         pnl = 0
-        for pos in self.positions:
-            q = quotes.get(pos['instrument_key'])
-            ltp = getattr(q, 'last_price', None) if q else None
+        for key, entry_price, signed_qty in self._pnl_legs:
+            q = quotes.get(key)
+            ltp = q.last_price if q is not None else None
             
             # If LTP is missing, we use entry price (assume 0 PnL for that leg) to avoid crashing or misleading spikes
             if ltp is None:
                 continue
                 
-            if pos['side'] == 'BUY':
-                pnl += (ltp - pos['entry_price']) * pos['qty']
-            else:
-                pnl += (pos['entry_price'] - ltp) * pos['qty']
+            pnl += (ltp - entry_price) * signed_qty
         return pnl
 
     def exit_all_positions(self, order_callback, reason):
         for pos in self.positions:
-            exit_side = 'SELL' if pos['side'] == 'BUY' else 'BUY'
-            order_callback(pos['instrument_key'], pos['qty'], exit_side, f"{reason}_EXIT", expiry=pos.get('expiry_dt'))
+            exit_side = 'SELL' if pos.side == 'BUY' else 'BUY'
+            order_callback(pos.instrument_key, pos.qty, exit_side, f"{reason}_EXIT", expiry=pos.expiry_dt)
         self.positions = []
+        self._reindex_positions()
         self.is_adjusted = False
 
     def save_state(self):
-        super().save_current_state({'positions': self.positions, 'is_adjusted': self.is_adjusted})
+        super().save_current_state({'positions': [asdict(pos) for pos in self.positions], 'is_adjusted': self.is_adjusted})
 
     def load_previous_state(self):
         state = super().load_previous_state()
         if state:
-            self.positions = state.get('positions', [])
+            self.positions = [Position.from_dict(p) for p in state.get('positions', [])]
+            self._reindex_positions()
             self.is_adjusted = state.get('is_adjusted', False)
             if self.positions:
-                self.log(f"{Fore.CYAN}RECOVERY: Loaded {len(self.positions)} existing positions.{Style.RESET_ALL}")
+                self.log(f"{_C}RECOVERY: Loaded {len(self.positions)} existing positions.{_RST}")
             return True
         return False
@@ -0,0 +1,38 @@
+import os
+from datetime import date
+import pandas as pd
+from instrument_manager import InstrumentMaster
+
+EXPIRY = date(2030, 1, 31)
+
+def _master(tmp_path, strike_col='strike'):
+    master = InstrumentMaster(data_dir=str(tmp_path))
+    master.df = pd.DataFrame({
+        'instrument_key': ['NSE_FO|1', 'NSE_FO|2', 'NSE_FO|3'],
+        'name': ['NIFTY', 'NIFTY', 'NIFTY'],
+        'instrument_type': ['PE', 'CE', 'FUT'],
+        strike_col: [21000, 21000, 0],
+        'expiry_dt': [EXPIRY, EXPIRY, EXPIRY],
+    })
+    master._build_key_index()
+    return master
+
+def test_key_index_hit_and_miss(tmp_path):
+    master = _master(tmp_path)
+    assert master.get_instrument_key('NIFTY', EXPIRY, 21000, 'PE') == 'NSE_FO|1'
+    assert master.get_instrument_key('NIFTY', EXPIRY, 21000.0, 'CE') == 'NSE_FO|2'
+    assert master.get_instrument_key('NIFTY', EXPIRY, 21050, 'PE') is None
+    # Futures are not indexed
+    assert master.get_contract('NSE_FO|3') is None
+    assert master.get_contract('NSE_FO|1') == ('NIFTY', EXPIRY, 21000.0, 'PE')
+
+def test_key_index_strike_price_fallback(tmp_path):
+    master = _master(tmp_path, strike_col='strike_price')
+    assert master.get_instrument_key('NIFTY', EXPIRY, 21000, 'PE') == 'NSE_FO|1'
+
+def test_pickle_round_trip(tmp_path):
+    _master(tmp_path)._save_pickle()
+    reloaded = InstrumentMaster(data_dir=str(tmp_path))
+    assert os.path.exists(reloaded.pickle_path)
+    assert reloaded._load_pickle()
+    assert reloaded.get_instrument_key('NIFTY', EXPIRY, 21000, 'CE') == 'NSE_FO|2'
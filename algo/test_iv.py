@@ -1,4 +1,9 @@
-from utils import calculate_implied_volatility, black_scholes_price
+import os
+import subprocess
+import sys
+import numpy as np
+import utils
+from utils import calculate_implied_volatility, calculate_implied_volatility_vec, black_scholes_price, _iv_cache_key
 
 def test_iv_calc():
     # Known Scenario
@@ -29,4 +34,68 @@ def test_iv_calc():
     iv_bad = calculate_implied_volatility(bad_price, S, 22000, t, r, 'p')
     print(f"IV for ITM Price < Intrinsic: {iv_bad}")
     
+def test_iv_vec_matches_scalar():
+    # Mixed chain: ATM/OTM puts and calls, one below-intrinsic quote and one expired contract
+    S = 21000
+    r = 0.07
+    strikes = np.array([20500, 21000, 21500, 21000, 22000, 21000])
+    times = np.array([0.05, 0.05, 0.1, 0.02, 0.05, 0.0])
+    flags = np.array(['p', 'p', 'c', 'c', 'p', 'c'])
+    prices = np.array([black_scholes_price(f, S, k, t, r, 0.18) if t > 0 else 50.0
+                       for f, k, t in zip(flags, strikes, times)])
+    prices[4] = 900  # Below the 1000 intrinsic of the 22000 put
+
+    ivs = calculate_implied_volatility_vec(prices, S, strikes, times, r, flags)
+    expected = [calculate_implied_volatility(p, S, k, t, r, f) for p, k, t, f in zip(prices, strikes, times, flags)]
+
+    assert np.allclose(ivs, expected, atol=1e-6), f"Vectorized IV mismatch: {ivs} vs {expected}"
+    assert ivs[4] == 0.001 and ivs[5] == 0.001
+
+def test_iv_above_500pct_not_floored():
+    # Expiry-day OTM call: the true IV (~528%) must not collapse to the 0.001 floor
+    iv = calculate_implied_volatility(20.0, 21000, 23000, 0.0001, 0.07, 'c')
+    assert abs(iv - 5.2768) < 1e-3, f"Got {iv}"
+
+def test_iv_cache_key_resolves_minutes():
+    one_minute = 1 / (365 * 24 * 60)
+    t = 2 / 24  # Two hours to expiry
+    assert _iv_cache_key('NSE_FO|1', 12.5, 21000, t, 'p') != _iv_cache_key('NSE_FO|1', 12.5, 21000, t + one_minute, 'p')
+
+def test_iv_vec_cached_solves_only_misses():
+    S, r, t = 21000, 0.07, 0.05
+    strikes = [20500, 21000, 21500]
+    prices = [black_scholes_price('p', S, k, t, r, 0.18) for k in strikes]
+    keys = ['NSE_FO|t1', 'NSE_FO|t2', 'NSE_FO|t3']
+    utils._iv_cache.clear()
+
+    first = utils.calculate_implied_volatility_vec_cached(keys, prices, S, strikes, t, r, 'p')
+    assert np.allclose(first, 0.18, atol=1e-4) and len(utils._iv_cache) == 3
+
+    # Only the strike whose LTP moved is re-solved
+    prices[1] += 5.0
+    second = utils.calculate_implied_volatility_vec_cached(keys, prices, S, strikes, t, r, 'p')
+    assert second[0] == first[0] and second[2] == first[2] and second[1] > first[1]
+    assert len(utils._iv_cache) == 4
+
+def test_iv_bounds_agree_across_backends():
+    # Arbitrage-violating quotes must give the same end on the Numba NR and pure-Python brentq paths
+    code = (
+        "from utils import calculate_implied_volatility as iv;"
+        "print(iv(25000.0, 21000, 21000, 0.05, 0.07, 'c'),"  # Call above spot
+        " iv(21500.0, 21000, 21000, 0.05, 0.07, 'p'),"       # Put above discounted strike
+        " iv(0.0, 21000, 21000, 0.05, 0.07, 'p'),"           # Zero-priced ATM put
+        " iv(2030.0, 21000, 19000, 0.05, 0.07, 'c'))"        # Call below S - K*exp(-r*t)
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for use_numba in ('1', '0'):
+        out = subprocess.run([sys.executable, '-c', code], cwd=here, capture_output=True, text=True,
+                             env=dict(os.environ, USE_NUMBA=use_numba), check=True)
+        results.append([float(x) for x in out.stdout.split()])
+    assert results[0] == results[1] == [10.0, 10.0, 0.001, 0.001], results
+
+    ivs = calculate_implied_volatility_vec([25000.0, 21500.0, 0.0, 2030.0], 21000, [21000, 21000, 21000, 19000],
+                                           0.05, 0.07, ['c', 'p', 'p', 'c'])
+    assert ivs.tolist() == [10.0, 10.0, 0.001, 0.001]
+
 test_iv_calc()
@@ -22,15 +22,17 @@ from upstox_wrapper import UpstoxWrapper
 class TestUpstoxWrapperAggressiveRetry(unittest.TestCase):
     def setUp(self):
         # Setup mock configuration
-        with patch('config.UPSTOX_ACCESS_TOKEN', 'fake_token'):
+        # HTTP/2 transport off, so calls go through the SDK and no httpx pool is opened
+        with patch('config.UPSTOX_ACCESS_TOKEN', 'fake_token'), patch('config.USE_HTTP2_TRANSPORT', False):
             self.wrapper = UpstoxWrapper()
         
-        # Ensure market_quote_api is a mock
+        # Ensure market_quote_api is a mock and calls go through it
         self.wrapper.market_quote_api = MagicMock()
 
     @patch('time.sleep', return_value=None) # Don't actually sleep
-    @patch('random.randint', return_value=0) # No jitter for predictable tests
-    def test_aggressive_retry_timing(self, mock_jitter, mock_sleep):
+    def test_aggressive_retry_timing(self, mock_sleep):
+        self.wrapper._jitter = [0.0] * len(self.wrapper._jitter) # No jitter for predictable tests
+
         # 1. Test Aggressive Backoff Sequence: 5, 10, 20...
         mock_429_error = MockApiException(status=429)
         mock_success_res = MagicMock()
@@ -44,11 +46,7 @@ class TestUpstoxWrapperAggressiveRetry(unittest.TestCase):
         
         # Assertions
         self.assertEqual(price, 21000.0)
-        # Total sleep calls = 3 backoffs + 4 inter-call delays (one before each ltp call)
-        # However, inter-call delay might not sleep on the VERY FIRST call because _last_call_time = 0.
-        # Let's count properly.
-        # call 1: _last_call_time=0, time.time()=X. elapsed=X. if X < 1.0, sleep.
-        # Actually in setup _last_call_time = 0. So if time.time() > 1.0, no sleep.
+        # The token bucket starts full, so the 4 ltp calls fit in the burst and only the backoffs sleep.
         
         # In this test, mock_sleep is patched. 
         # The backoff calls are 5, 10, 20. 
@@ -57,22 +55,119 @@ class TestUpstoxWrapperAggressiveRetry(unittest.TestCase):
         self.assertIn(unittest.mock.call(20.0), mock_sleep.call_args_list)
         print("Test passed: Aggressive backoff timing verified.")
 
-    @patch('time.time')
+    @patch('time.monotonic', return_value=100.0)
     @patch('time.sleep')
-    def test_inter_call_delay(self, mock_sleep, mock_time):
-        # Mock time to simulate calls exactly 0.1s apart
-        # now will be 100.1, last_call_time was 100.0
-        mock_time.side_effect = [100.1, 101.1] 
-        
-        self.wrapper._last_call_time = 100.0
-        
-        # First call to _wait_for_rate_limit: now=100.1. elapsed=0.1. wait=0.9.
-        self.wrapper._wait_for_rate_limit()
-        
-        # Use assertAlmostEqual for floating point precision
+    def test_token_bucket_throttles_after_burst(self, mock_sleep, mock_time):
+        # Freeze the clock on a full bucket: the burst passes, the next call waits for one refill
+        bucket = self.wrapper._rate_buckets['ltp']
+        bucket.tokens = bucket.capacity
+        bucket.last = 100.0
+
+        for _ in range(self.wrapper._rate_burst):
+            self.wrapper._wait_for_rate_limit('ltp')
+        mock_sleep.assert_not_called()
+
+        self.wrapper._wait_for_rate_limit('ltp')
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 1.0 / self.wrapper._rate_per_sec, places=7)
+
+        # Other endpoints keep their own budget
+        self.wrapper._wait_for_rate_limit('order')
         mock_sleep.assert_called_once()
-        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.9, places=7)
-        print("Test passed: Inter-call delay enforced.")
+        print("Test passed: Token bucket throttles only after the burst.")
+
+    def test_duplicate_quote_requests_hit_cache(self):
+        mock_success_res = MagicMock()
+        mock_success_res.status = 'success'
+        mock_success_res.data = {'NSE_FO:1': MagicMock(instrument_token='NSE_FO|1', last_price=10.0)}
+        self.wrapper.market_quote_api.ltp = MagicMock(return_value=mock_success_res)
+
+        first = self.wrapper.get_option_chain_quotes(['NSE_FO|1', 'NSE_FO|2'])
+        second = self.wrapper.get_option_chain_quotes(['NSE_FO|2', 'NSE_FO|1'])
+
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_count, 1)
+        self.assertEqual(first, second)
+        # Callers get copies: mutating a result must not leak into the cached entry
+        first['NSE_FO|9'] = MagicMock(last_price=1.0)
+        third = self.wrapper.get_option_chain_quotes(['NSE_FO|1', 'NSE_FO|2'])
+        self.assertNotIn('NSE_FO|9', third)
+        print("Test passed: Duplicate quote request served from cache.")
+
+    @patch('time.sleep', return_value=None)
+    def test_chunked_quotes_retry_429(self, mock_sleep):
+        # More keys than _QUOTE_CHUNK: chunks run concurrently but keep the 429 backoff
+        self.wrapper._jitter = [0.0] * len(self.wrapper._jitter)
+        keys = [f'NSE_FO|{i}' for i in range(self.wrapper._QUOTE_CHUNK + 1)]
+        mock_success_res = MagicMock()
+        mock_success_res.status = 'success'
+        mock_success_res.data = {'NSE_FO:1': MagicMock(instrument_token='NSE_FO|1', last_price=10.0)}
+        self.wrapper.market_quote_api.ltp.side_effect = [MockApiException(status=429), mock_success_res, mock_success_res]
+
+        quotes = self.wrapper.get_option_chain_quotes(keys)
+
+        self.assertEqual(quotes['NSE_FO|1'].last_price, 10.0)
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_count, 3)
+        mock_sleep.assert_any_call(5.0)
+
+    def test_streamed_ticks_served_before_rest(self):
+        self.wrapper._on_feed_message({'feeds': {
+            'NSE_FO|1': {'ltpc': {'ltp': 12.5}},
+            'NSE_INDEX|Nifty 50': {'ltpc': {'ltp': 21000.0}},
+        }})
+        mock_success_res = MagicMock()
+        mock_success_res.status = 'success'
+        mock_success_res.data = {'NSE_FO:2': MagicMock(instrument_token='NSE_FO|2', last_price=8.0)}
+        self.wrapper.market_quote_api.ltp.return_value = mock_success_res
+
+        self.assertEqual(self.wrapper.get_spot_price('NSE_INDEX|Nifty 50'), 21000.0)
+        quotes = self.wrapper.get_option_chain_quotes(['NSE_FO|1', 'NSE_FO|2'])
+        self.assertEqual(quotes['NSE_FO|1'].last_price, 12.5)
+        self.assertEqual(quotes['NSE_FO|2'].last_price, 8.0)
+        # Only the key without a tick went over REST
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_count, 1)
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_args.kwargs['symbol'], 'NSE_FO|2')
+        # The streamed tick is not merged into the cached REST entry
+        self.assertNotIn('NSE_FO|1', self.wrapper._quote_cache[('NSE_FO|2',)][1])
+
+        # Stale ticks fall back to REST
+        self.wrapper._ltp_store['NSE_FO|1'] = (time.monotonic() - 5, 12.5)
+        self.wrapper.get_option_chain_quotes(['NSE_FO|1'])
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_args.kwargs['symbol'], 'NSE_FO|1')
+
+    def test_start_feed_syncs_subscription(self):
+        streamer_cls = MagicMock()
+        with patch.object(sys.modules['upstox_wrapper'].upstox_client, 'MarketDataStreamerV3', streamer_cls):
+            self.assertTrue(self.wrapper.start_feed(['NSE_FO|1', 'NSE_FO|2']))
+            feed = streamer_cls.return_value
+            self.assertEqual(streamer_cls.call_args.args[1], ['NSE_FO|1', 'NSE_FO|2'])
+            self.wrapper._on_feed_message({'feeds': {'NSE_FO|1': {'ltpc': {'ltp': 12.5}}}})
+
+            # Same keys again: nothing to change on the socket
+            self.wrapper.start_feed(['NSE_FO|2', 'NSE_FO|1'])
+            feed.subscribe.assert_not_called()
+            feed.unsubscribe.assert_not_called()
+
+            # Chain rolled: the new key is added, the dropped one unsubscribed and its tick discarded
+            self.wrapper.start_feed(['NSE_FO|2', 'NSE_FO|3'])
+            feed.subscribe.assert_called_once_with(['NSE_FO|3'], 'ltpc')
+            feed.unsubscribe.assert_called_once_with(['NSE_FO|1'])
+            self.assertNotIn('NSE_FO|1', self.wrapper._ltp_store)
+            self.assertEqual(streamer_cls.call_count, 1)
+
+    def test_spot_price_ttl_cache_and_invalidate(self):
+        mock_success_res = MagicMock()
+        mock_success_res.status = 'success'
+        mock_success_res.data = {'NSE_INDEX:Nifty 50': MagicMock(last_price=21000.0)}
+        self.wrapper.market_quote_api.ltp = MagicMock(return_value=mock_success_res)
+
+        self.assertEqual(self.wrapper.get_spot_price('NSE_INDEX|Nifty 50'), 21000.0)
+        self.assertEqual(self.wrapper.get_spot_price('NSE_INDEX|Nifty 50'), 21000.0)
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_count, 1)
+
+        self.wrapper.invalidate('NSE_INDEX|Nifty 50')
+        self.wrapper.get_spot_price('NSE_INDEX|Nifty 50')
+        self.assertEqual(self.wrapper.market_quote_api.ltp.call_count, 2)
+        print("Test passed: Spot price served from TTL cache until invalidated.")
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,67 +1,209 @@
+import atexit
 import csv
+import io
 import os
 import json
-from datetime import datetime
+import queue
+import threading
+import time
+import numpy as np
 from colorama import Fore, Style
 import config
 
+try:
+    import pandas as pd
+except ImportError:
+    pd = None  # Fall back to the csv module scan
+
+# Color codes bound once so summary printing avoids repeated attribute lookups
+_G, _R, _Y, _W, _C, _RST = Fore.GREEN, Fore.RED, Fore.YELLOW, Fore.WHITE, Fore.CYAN, Style.RESET_ALL
+
+# Clock functions bound once for log_trade
+_time, _strftime, _localtime = time.time, time.strftime, time.localtime
+
+# Queue marker telling the writer thread to exit
+_STOP = object()
+
 class TradeJournal:
+    # Max rows the writer thread writes between flushes
+    BATCH_SIZE = 64
+
+    # print_summary templates, color codes baked in once
+    _TITLE_FMT = f"{_C}TRADE SESSION SUMMARY{_RST}"
+    _CLOSED_FMT = f"Closed P&L:    {_W}INR {{:,.2f}}{_RST}"
+    _OPEN_FMT = f"Open P&L:      {_W}INR {{:,.2f}}{_RST}"
+    _TOTAL_FMT = "Total P&L:     {}INR {:,.2f}" + _RST
+    _WEEKLY_FMT = f"OPEN Weekly:   {_Y}{{}} {{}}{_RST} @ {{}} (Expiry: {{}} | Current: {{}})"
+    _MONTHLY_FMT = f"OPEN Monthly:  {_Y}{{}} {{}}{_RST} @ {{}} (Expiry: {{}} | Current: {{}})"
+    _LEGS_HEADER_FMT = "-" * 25 + " Open Legs (Expiry: {}) " + "-" * 25
+    _LEG_FMT = "{}{} {} {} {} @ {}" + _RST + " (LTP: {} | Net Points: {:.2f})"
+
     def __init__(self, filename="trade_log.csv"):
         # Add trading mode to filename
         mode = config.TRADING_MODE.lower()
         # Insert mode before .csv extension
         base_name = filename.replace('.csv', '')
         self.filename = f"{base_name}_{mode}.csv"
+        # Sidecar holding the closed P&L total and the byte offset of the log it covers
+        self.checkpoint_file = f"{base_name}_{mode}.pnl.json"
         self.headers = ['timestamp', 'instrument_key', 'side', 'qty', 'price', 'expiry', 'tag', 'pnl']
         self._initialize_file()
         self.closed_pnl = 0.0
         self._calculate_fixed_pnl()
+        # Rows are queued by log_trade and written by a background thread that owns the file handle
+        self._fh = open(self.filename, 'a', newline='', buffering=65536)
+        self._q = queue.SimpleQueue()
+        self._put = self._q.put
+        self._thread = threading.Thread(target=self._drain, args=(self._q, self._fh, self.BATCH_SIZE),
+                                        name=f"journal-{base_name}", daemon=True)
+        self._thread.start()
+        # Daemon threads are killed at exit, so drain whatever is still queued first
+        atexit.register(self.close)
+        # log_trade timestamp cache: bursts within the same second reuse one formatted string
+        self._ts_sec = 0
+        self._ts_str = ''
 
     def _initialize_file(self):
         if not os.path.exists(self.filename):
             with open(self.filename, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=self.headers)
-                writer.writeheader()
+                csv.writer(f).writerow(self.headers)
 
     def _calculate_fixed_pnl(self):
-        """Pre-calculate P&L from historical closed trades if file exists."""
-        # Simple implementation: sum of all 'pnl' columns that are numeric
+        """
+        Pre-calculate P&L from historical closed trades if file exists.
+        Resumes from the checkpoint sidecar so only rows appended since the last run are parsed.
+        """
+        size = os.path.getsize(self.filename)
+        # Header-only log (csv writes \r\n line endings): nothing to sum, skip the checkpoint and scan
+        if size <= len(','.join(self.headers)) + 2:
+            # Any checkpoint left over from a longer, since-reset log no longer applies
+            try:
+                os.remove(self.checkpoint_file)
+            except OSError:
+                pass
+            return
+        checkpoint = self._load_checkpoint()
+        if checkpoint and checkpoint['offset'] <= size:
+            self.closed_pnl = checkpoint['closed_pnl']
+            if checkpoint['offset'] < size:
+                with open(self.filename, 'rb') as f:
+                    f.seek(checkpoint['offset'])
+                    new_rows = f.read().decode('utf-8')
+                self.closed_pnl += self._sum_pnl(csv.reader(io.StringIO(new_rows)))
+        else:
+            # No checkpoint, or the log was truncated/replaced since it was written
+            self._scan_fixed_pnl()
+        self._save_checkpoint(size)
+
+    def _scan_fixed_pnl(self):
+        """Full scan of the trade log."""
+        # Fast path: C parser reads only the pnl column; non-numeric cells become NaN and are skipped by sum()
+        if pd is not None:
+            try:
+                pnl = pd.to_numeric(pd.read_csv(self.filename, usecols=['pnl'])['pnl'], errors='coerce')
+                self.closed_pnl += float(pnl.sum())
+                return
+            except Exception:
+                pass
+
+        # Simple implementation: sum of all 'pnl' columns that are numeric (pnl is the last column)
         try:
-            with open(self.filename, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['pnl'] and row['pnl'] != 'None':
-                        self.closed_pnl += float(row['pnl'])
+            with open(self.filename, 'r', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None) # Header
+                self.closed_pnl += self._sum_pnl(reader)
         except Exception:
             pass
 
+    @staticmethod
+    def _sum_pnl(rows):
+        """Sums the trailing pnl field of raw csv rows, skipping blank/non-numeric values."""
+        total = 0.0
+        for row in rows:
+            value = row[-1] if row else ''
+            if value and value != 'None':
+                try:
+                    total += float(value)
+                except ValueError:
+                    pass
+        return total
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                checkpoint = json.load(f)
+            return {'closed_pnl': float(checkpoint['closed_pnl']), 'offset': int(checkpoint['offset'])}
+        except Exception:
+            return None
+
+    def _save_checkpoint(self, offset):
+        try:
+            with open(self.checkpoint_file, 'w') as f:
+                json.dump({'closed_pnl': self.closed_pnl, 'offset': offset}, f)
+        except Exception as e:
+            print(f"Error saving P&L checkpoint: {e}")
+
     def log_trade(self, instrument_key, side, qty, price, tag, expiry='N/A', pnl=None):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.filename, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=self.headers)
-            writer.writerow({
-                'timestamp': timestamp,
-                'instrument_key': instrument_key,
-                'side': side,
-                'qty': qty,
-                'price': price,
-                'expiry': expiry,
-                'tag': tag,
-                'pnl': pnl
-            })
+        sec = int(_time())
+        if sec != self._ts_sec:
+            self._ts_str = _strftime("%Y-%m-%d %H:%M:%S", _localtime(sec))
+            self._ts_sec = sec
+        timestamp = self._ts_str
+        # Row order must match self.headers
+        self._put((timestamp, instrument_key, side, qty, price, expiry, tag, pnl))
         if pnl is not None:
             self.closed_pnl += pnl
 
+    @staticmethod
+    def _drain(q, fh, batch_size):
+        """Writer thread: writes queued rows in batches, flushing after each batch."""
+        writerow = csv.writer(fh).writerow
+        flush = fh.flush
+        get, get_nowait = q.get, q.get_nowait
+        running = True
+        while running:
+            batch = [get()]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is _STOP:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    # flush() barrier: everything queued before it has been written
+                    flush()
+                    item.set()
+                else:
+                    writerow(item)
+            flush()
+
+    def flush(self):
+        """Blocks until every row queued so far is on disk."""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._q.put(done)
+            done.wait()
+
+    def close(self):
+        """Drains the queue, stops the writer thread and closes the journal file."""
+        if self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join()
+        if not self._fh.closed:
+            self._fh.close()
+
     def print_summary(self, open_pnl, strategy_state):
         total_pnl = self.closed_pnl + open_pnl
-        pnl_color = Fore.GREEN if total_pnl >= 0 else Fore.RED
+        pnl_color = _G if total_pnl >= 0 else _R
         
         print("\n" + "="*50)
-        print(f"{Fore.CYAN}TRADE SESSION SUMMARY{Style.RESET_ALL}")
+        print(self._TITLE_FMT)
         print("="*50)
-        print(f"Closed P&L:    {Fore.WHITE}INR {self.closed_pnl:,.2f}{Style.RESET_ALL}")
-        print(f"Open P&L:      {Fore.WHITE}INR {open_pnl:,.2f}{Style.RESET_ALL}")
-        print(f"Total P&L:     {pnl_color}INR {total_pnl:,.2f}{Style.RESET_ALL}")
+        print(self._CLOSED_FMT.format(self.closed_pnl))
+        print(self._OPEN_FMT.format(open_pnl))
+        print(self._TOTAL_FMT.format(pnl_color, total_pnl))
         print("-" * 50)
         
         if strategy_state.get('weekly'):
@@ -78,7 +220,7 @@ class TradeJournal:
             entry = w.get('entry_price', 'N/A')
             ltp_raw = strategy_state.get('weekly_ltp')
             ltp = f"{ltp_raw:,.2f}" if ltp_raw is not None else "N/A"
-            print(f"OPEN Weekly:   {Fore.YELLOW}{strike} {inst_type}{Style.RESET_ALL} @ {entry} (Expiry: {expiry_str} | Current: {ltp})")
+            print(self._WEEKLY_FMT.format(strike, inst_type, entry, expiry_str, ltp))
             
         if strategy_state.get('monthly'):
             m = strategy_state['monthly']
@@ -94,7 +236,7 @@ class TradeJournal:
             entry = m.get('entry_price', 'N/A')
             ltp_raw = strategy_state.get('monthly_ltp')
             ltp = f"{ltp_raw:,.2f}" if ltp_raw is not None else "N/A"
-            print(f"OPEN Monthly:  {Fore.YELLOW}{strike} {inst_type}{Style.RESET_ALL} @ {entry} (Expiry: {expiry_str} | Current: {ltp})")
+            print(self._MONTHLY_FMT.format(strike, inst_type, entry, expiry_str, ltp))
         
         # Generic Position Support
         if strategy_state.get('positions'):
@@ -102,21 +244,23 @@ class TradeJournal:
             first_pos = strategy_state['positions'][0] if strategy_state['positions'] else {}
             expiry_info = first_pos.get('expiry_dt', 'N/A')
             
-            print("-" * 25 + f" Open Legs (Expiry: {expiry_info}) " + "-" * 25)
-            for p in strategy_state['positions']:
-                side_col = Fore.GREEN if p['side'] == 'BUY' else Fore.RED
-                qty = p['qty']
-                entry = p['entry_price']
-                ltp_raw = p.get('ltp')
-                ltp = f"{ltp_raw:,.2f}" if isinstance(ltp_raw, (int, float)) else "N/A"
-                
-                # Calculate "Points" (Normalized to standard lot for easy strategy review)
-                # If QTY=150 and Lot=75, multiplier is 2. Multiplier * Price = Points.
-                multiplier = qty / config.ORDER_QUANTITY
-                net_points_entry = entry * multiplier
-                net_points_ltp = ltp_raw * multiplier if isinstance(ltp_raw, (int, float)) else 0.0
-                
-                print(f"{side_col}{p['side']} {qty} {p.get('type','')} {p.get('strike','')} @ {entry}{Style.RESET_ALL} "
-                      f"(LTP: {ltp} | Net Points: {net_points_ltp:.2f})")
+            print(self._LEGS_HEADER_FMT.format(expiry_info))
+            positions = strategy_state['positions']
+            n = len(positions)
+            qtys = np.fromiter((p['qty'] for p in positions), dtype=np.float64, count=n)
+            # Missing/non-numeric LTPs become NaN
+            ltps = np.fromiter((p.get('ltp') if isinstance(p.get('ltp'), (int, float)) else np.nan for p in positions),
+                               dtype=np.float64, count=n)
+
+            # Calculate "Points" (Normalized to standard lot for easy strategy review)
+            # If QTY=150 and Lot=75, multiplier is 2. Multiplier * Price = Points.
+            multipliers = qtys / config.ORDER_QUANTITY
+            net_points_ltp = np.nan_to_num(ltps * multipliers, nan=0.0)
+
+            for p, ltp_raw, net_ltp in zip(positions, ltps.tolist(), net_points_ltp.tolist()):
+                side_col = _G if p['side'] == 'BUY' else _R
+                ltp = "N/A" if np.isnan(ltp_raw) else f"{ltp_raw:,.2f}"
+                print(self._LEG_FMT.format(side_col, p['side'], p['qty'], p.get('type', ''), p.get('strike', ''),
+                                           p['entry_price'], ltp, net_ltp))
         
         print("="*50 + "\n")
@@ -1,12 +1,79 @@
 import os
+import copy
+import json
 import time
 import random
+import asyncio
 import upstox_client
 from upstox_client.rest import ApiException
 import config
 import threading
+from collections import OrderedDict
+from functools import cached_property
+from types import SimpleNamespace
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads  # Fall back to stdlib json
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # REST calls go through the SDK's urllib3 pool
+
+_API_BASE = 'https://api.upstox.com/v2'
+_ORDER_URL = 'https://api-hft.upstox.com/v2/order/place' # Orders are served from the HFT host
+
+# One ApiClient (and its urllib3 connection pool) per access token, shared by every wrapper
+# instance so keep-alive connections are reused instead of paying a fresh TLS handshake.
+_CLIENT_CACHE = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+_CONNECTION_POOL_MAXSIZE = 16
+
+def _get_api_client(access_token):
+    with _CLIENT_CACHE_LOCK:
+        api_client = _CLIENT_CACHE.get(access_token)
+        if api_client is None:
+            configuration = upstox_client.Configuration()
+            configuration.access_token = access_token
+            configuration.connection_pool_maxsize = _CONNECTION_POOL_MAXSIZE
+            api_client = upstox_client.ApiClient(configuration)
+            _CLIENT_CACHE[access_token] = api_client
+        return api_client
+
+class UpstoxAuthError(Exception):
+    """Raised on 401 so the caller can shut down cleanly instead of the process being killed."""
+    pass
+
+class _TokenBucket:
+    """Allows bursts of up to `capacity` calls, refilling at `rate` calls per second."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                time.sleep(wait)
+                # The token that refilled while sleeping is consumed by this call
+                self.tokens = 1
+                self.last = now + wait
+            self.tokens -= 1
 
 class UpstoxWrapper:
+    # 429 backoff base per retry: 5, 10, 20, 40, 80 seconds
+    _BACKOFF_BASES = (5, 10, 20, 40, 80)
+    _JITTER_SIZE = 32 # Power of two so the index wraps with a mask
+    _QUOTE_CHUNK = 500 # Max instrument keys per LTP request
+
     def __init__(self, access_token=None):
         """
         Initialize Upstox Client.
@@ -18,41 +85,137 @@ class UpstoxWrapper:
         if not self.access_token:
             print("WARNING: No Upstox Access Token provided. Set UPSTOX_ACCESS_TOKEN env var.")
             self.access_token = "" # Avoid NoneType error in client lib
-        
-        self.configuration = upstox_client.Configuration()
-        self.configuration.access_token = self.access_token
+        # Without a token every call is a guaranteed 401, so API methods fail fast locally
+        self._disabled = not self.access_token
         
         # API Instances
-        self.api_client = upstox_client.ApiClient(self.configuration)
-        self.history_api = upstox_client.HistoryApi(self.api_client)
-        self.order_api = upstox_client.OrderApi(self.api_client)
-        self.user_api = upstox_client.UserApi(self.api_client)
-        self.market_quote_api = upstox_client.MarketQuoteApi(self.api_client)
+        self.api_client = _get_api_client(self.access_token)
+        self.configuration = self.api_client.configuration
+        # history_api / order_api / user_api / market_quote_api are built on first use (see below)
+
+        # Opt-in HTTP/2 client (config.USE_HTTP2_TRANSPORT): every REST call multiplexed over one
+        # TLS connection per host, bypassing the SDK's model marshalling. Needs `httpx[http2]`;
+        # otherwise, and by default, the SDK is used.
+        self._http = None
+        if config.USE_HTTP2_TRANSPORT and httpx is not None and self.access_token:
+            try:
+                self._http = httpx.Client(
+                    http2=True,
+                    base_url=_API_BASE,
+                    headers={'Authorization': f'Bearer {self.access_token}', 'Accept': 'application/json'},
+                    timeout=5.0,
+                    limits=httpx.Limits(max_keepalive_connections=4),
+                )
+            except ImportError:
+                pass # h2 package missing
+
+        # Order fields that never change between orders, built and validated once;
+        # place_order copies them and sets only quantity, instrument, order type and side
+        self._order_defaults = dict(
+            product=config.ORDER_PRODUCT,
+            validity=config.ORDER_VALIDITY,
+            price=0.0,
+            tag=config.ORDER_TAG_PREFIX,
+            disclosed_quantity=0,
+            trigger_price=0.0,
+            is_amo=False
+        )
+        self._order_template = upstox_client.PlaceOrderRequest(
+            quantity=1, instrument_token='', order_type='MARKET', transaction_type='BUY', **self._order_defaults
+        )
         
-        # Rate limiting state
-        self._last_call_time = 0
-        self._rate_limit_lock = threading.Lock()
-        self._mandatory_delay = 1.0 # 1 second between any two API calls
-
-    def _wait_for_rate_limit(self):
-        """Ensures at least _mandatory_delay seconds have passed since the last API call."""
-        with self._rate_limit_lock:
-            now = time.time()
-            elapsed = now - self._last_call_time
-            if elapsed < self._mandatory_delay:
-                wait_to_sleep = self._mandatory_delay - elapsed
-                time.sleep(wait_to_sleep)
-            self._last_call_time = time.time()
+        # Rate limiting state: one token bucket per endpoint so quote polling never queues behind orders
+        self._rate_per_sec = 25 # Sustained requests per second per endpoint
+        self._rate_burst = 5    # Requests allowed back-to-back before throttling kicks in
+        self._rate_buckets = {
+            endpoint: _TokenBucket(self._rate_per_sec, self._rate_burst)
+            for endpoint in ('ltp', 'order', 'user')
+        }
+
+        # Retry jitter (0-2s) drawn once; retries cycle through the table
+        self._jitter = [random.random() * 2 for _ in range(self._JITTER_SIZE)]
+        self._jitter_idx = 0
+
+        # Short-lived LRU of chain quotes so duplicate requests within a tick share one API call
+        self.quote_ttl = 0.5 # seconds
+        self._quote_cache = OrderedDict() # sorted instrument_keys tuple -> (timestamp, quotes)
+        self._quote_cache_maxsize = 32
+
+        # Spot LTPs and funds change slower than the strategy polls them
+        self._ltp_ttl = 0.5 # seconds
+        self._ltp_cache = {} # instrument_key -> (timestamp, price)
+        self._funds_ttl = 2.0 # seconds; margin only moves meaningfully on orders
+        self._funds_cache = None # (timestamp, available_margin)
+
+        # WebSocket LTP feed (see start_feed): pushed ticks, read before falling back to REST
+        self._feed = None
+        self._feed_keys = set()
+        self._feed_max_age = 1.0 # seconds; older ticks are treated as missing
+        self._ltp_store = {} # instrument_key -> (timestamp, ltp)
+
+    # SDK API instances are created lazily: read-only drivers never pay for the order/user clients
+    @cached_property
+    def history_api(self):
+        return upstox_client.HistoryApi(self.api_client)
+
+    @cached_property
+    def order_api(self):
+        return upstox_client.OrderApi(self.api_client)
+
+    @cached_property
+    def user_api(self):
+        return upstox_client.UserApi(self.api_client)
+
+    @cached_property
+    def market_quote_api(self):
+        return upstox_client.MarketQuoteApi(self.api_client)
+
+    def __del__(self):
+        # _http may be missing if __init__ failed part-way
+        if getattr(self, '_http', None) is not None:
+            self._http.close()
+
+    def _get(self, path, params=None):
+        """GET on the HTTP/2 client; returns the decoded JSON payload."""
+        return self._request('GET', path, params=params)
+
+    def _post(self, path, json=None):
+        """POST on the HTTP/2 client; returns the decoded JSON payload."""
+        return self._request('POST', path, json=json)
+
+    def _request(self, method, path, **kwargs):
+        resp = self._http.request(method, path, **kwargs)
+        if resp.status_code >= 400:
+            # Same exception the SDK raises, so retry and error handling work for both transports
+            e = ApiException(status=resp.status_code, reason=resp.reason_phrase)
+            e.body = resp.content
+            raise e
+        return _json_loads(resp.content)
+
+    @staticmethod
+    def _ltp_response(payload):
+        """Shapes a raw LTP JSON payload like the SDK response (status, data of last_price/instrument_token)."""
+        data = {
+            key: SimpleNamespace(last_price=val.get('last_price'), instrument_token=val.get('instrument_token'))
+            for key, val in (payload.get('data') or {}).items()
+        }
+        return SimpleNamespace(status=payload.get('status'), data=data)
+
+    def _wait_for_rate_limit(self, endpoint='ltp'):
+        """Blocks only when the endpoint's token bucket is empty."""
+        self._rate_buckets[endpoint].acquire()
 
     def _safe_ltp_call(self, symbol, max_retries=5):
         """
         Helper to call the ltp API with aggressive retry logic for 429 (Too Many Requests).
-        Uses exponential backoff with jitter and mandatory inter-call delay.
+        Uses exponential backoff with jitter on top of the per-endpoint token bucket.
         """
         retries = 0
         while retries <= max_retries:
             self._wait_for_rate_limit()
             try:
+                if self._http is not None:
+                    return self._ltp_response(self._get('/market-quote/ltp', params={'symbol': symbol}))
                 return self.market_quote_api.ltp(symbol=symbol, api_version='2.0')
             except ApiException as e:
                 if e.status == 429:
@@ -62,38 +225,71 @@ class UpstoxWrapper:
                         raise e
                     
                     # More aggressive backoff: 5, 10, 20, 40, 80...
-                    wait_time = (5 * (2 ** (retries - 1))) + (random.randint(0, 2000) / 1000)
+                    if retries <= len(self._BACKOFF_BASES):
+                        base = self._BACKOFF_BASES[retries - 1]
+                    else:
+                        base = 5 * (2 ** (retries - 1))
+                    jitter = self._jitter[self._jitter_idx & (self._JITTER_SIZE - 1)]
+                    self._jitter_idx += 1
+                    wait_time = base + jitter
                     print(f"CRITICAL WARNING: 429 Too Many Requests. Burst detected. Retrying in {wait_time:.2f}s (Attempt {retries}/{max_retries})...")
                     time.sleep(wait_time)
                 elif e.status == 401:
-                    print("CRITICAL: Unauthorized. Check your UPSTOX_ACCESS_TOKEN.")
-                    os._exit(1)
+                    raise UpstoxAuthError("Unauthorized. Check your UPSTOX_ACCESS_TOKEN.")
                 else:
                     raise e
         return None
 
+    def invalidate(self, instrument_key=None):
+        """
+        Drops the cached spot price for instrument_key, e.g. to force a fresh read after a trade.
+        With no key, clears every cached spot price and the cached funds.
+        """
+        if instrument_key is None:
+            self._ltp_cache.clear()
+            self._funds_cache = None
+        else:
+            self._ltp_cache.pop(instrument_key, None)
+
     def get_spot_price(self, instrument_key):
         """
         Get latest Last Traded Price (LTP) for an instrument.
         Example instrument_key: 'NSE_INDEX|Nifty 50'
+        Repeat calls within _ltp_ttl are served from an in-process cache.
         """
+        if self._disabled:
+            return None
+        now = time.monotonic()
+        ltp = self._feed_ltp(instrument_key, now)
+        if ltp is not None:
+            return ltp
+        hit = self._ltp_cache.get(instrument_key)
+        if hit and now - hit[0] < self._ltp_ttl:
+            return hit[1]
+        price = self._fetch_spot_price(instrument_key)
+        if price is not None:
+            self._ltp_cache[instrument_key] = (now, price)
+        return price
+
+    def _fetch_spot_price(self, instrument_key):
         try:
             # Full market quote
             api_response = self._safe_ltp_call(symbol=instrument_key)
             if api_response and api_response.status == 'success':
+                data = api_response.data
                 # The API sometimes returns keys with : instead of | in the dictionary
-                res_key = instrument_key.replace('|', ':')
-                if instrument_key in api_response.data:
-                    return api_response.data[instrument_key].last_price
-                elif res_key in api_response.data:
-                    return api_response.data[res_key].last_price
+                for key in (instrument_key, instrument_key.replace('|', ':')):
+                    quote = data.get(key)
+                    if quote is not None:
+                        return quote.last_price
                 
                 # Fallback: if data has items, return first one's price
-                if api_response.data:
-                    first_key = list(api_response.data.keys())[0]
-                    return api_response.data[first_key].last_price
+                if data:
+                    return next(iter(data.values())).last_price
                     
             return None
+        except UpstoxAuthError:
+            raise
         except Exception as e:
             print(f"Exception when fetching spot price: {e}")
             return None
@@ -102,31 +298,178 @@ class UpstoxWrapper:
         """
         Get quotes for a list of option keys to build a chain.
         """
-        if not instrument_keys:
+        if not instrument_keys or self._disabled:
             return {}
+
+        # Deduplicated, sorted keys: stable cache key and no repeated symbols in the request
+        cache_key = tuple(sorted(set(instrument_keys)))
+
+        if self._ltp_store:
+            # Streamed ticks first; only keys without a fresh tick go over REST
+            now = time.monotonic()
+            streamed = {}
+            missing = []
+            for key in cache_key:
+                ltp = self._feed_ltp(key, now)
+                if ltp is None:
+                    missing.append(key)
+                else:
+                    streamed[key] = SimpleNamespace(last_price=ltp, instrument_token=key)
+            if not missing:
+                return streamed
+            if streamed:
+                rest = self._rest_chain_quotes(tuple(missing))
+                if not rest:
+                    return {}
+                merged = dict(rest)
+                merged.update(streamed)
+                return merged
+
+        return self._rest_chain_quotes(cache_key)
+
+    def _rest_chain_quotes(self, cache_key):
+        """
+        REST LTPs for sorted, deduplicated keys, cached for quote_ttl. All or nothing: {} on failure.
+        Callers get a shallow copy, so changing the returned dict never touches the cache.
+        """
+        cached = self._quote_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < self.quote_ttl:
+            self._quote_cache.move_to_end(cache_key)
+            return dict(cached[1])
             
         try:
-            # quotes for multiple symbols
-            symbols_str = ",".join(instrument_keys)
-            api_response = self._safe_ltp_call(symbol=symbols_str)
-            if api_response and api_response.status == 'success':
-                # Normalize keys in response back to | (pipe) to match our internal keys
-                normalized_data = {}
-                for key, val in api_response.data.items():
-                    token = getattr(val, 'instrument_token', None)
-                    if token:
-                        norm_token = token.replace(':', '|')
-                        normalized_data[norm_token] = val
-                    
-                    norm_key = key.replace(':', '|')
-                    normalized_data[norm_key] = val
-                    
-                return normalized_data
-            return {}
+            # quotes for multiple symbols, in chunks of at most _QUOTE_CHUNK keys
+            if len(cache_key) <= self._QUOTE_CHUNK:
+                responses = [self._safe_ltp_call(symbol=",".join(cache_key))]
+            else:
+                # Several chunks: overlap their round trips instead of paying them back to back
+                responses = asyncio.run(self._gather_quote_chunks(cache_key, self._QUOTE_CHUNK))
+            normalized_data = {}
+            for api_response in responses:
+                if isinstance(api_response, Exception):
+                    raise api_response
+                if not (api_response and api_response.status == 'success'):
+                    return {}
+                self._normalize_quotes(api_response.data, normalized_data)
+                
+            self._quote_cache[cache_key] = (time.monotonic(), normalized_data)
+            self._quote_cache.move_to_end(cache_key)
+            if len(self._quote_cache) > self._quote_cache_maxsize:
+                self._quote_cache.popitem(last=False)
+            return dict(normalized_data)
+        except UpstoxAuthError:
+            raise
         except Exception as e:
             print(f"Error getting quotes: {e}")
             return {}
 
+    async def get_option_chain_quotes_async(self, instrument_keys, chunk=200):
+        """
+        Get quotes for a list of option keys, firing chunks of at most `chunk` keys concurrently.
+        Failed chunks are reported and skipped, so the result may be partial. Not cached.
+        """
+        if not instrument_keys or self._disabled:
+            return {}
+
+        normalized_data = {}
+        for api_response in await self._gather_quote_chunks(tuple(sorted(set(instrument_keys))), chunk):
+            if isinstance(api_response, UpstoxAuthError):
+                raise api_response
+            if isinstance(api_response, Exception):
+                print(f"Error getting quotes: {api_response}")
+            elif api_response and api_response.status == 'success':
+                self._normalize_quotes(api_response.data, normalized_data)
+        return normalized_data
+
+    async def _gather_quote_chunks(self, keys, chunk):
+        """Runs one LTP request per chunk concurrently; returns responses or exceptions in chunk order."""
+        chunks = [keys[i:i + chunk] for i in range(0, len(keys), chunk)]
+        # Each chunk runs _safe_ltp_call on a worker thread: same 429 backoff, token bucket
+        # and pooled connections (httpx or SDK) as the sequential path
+        return await asyncio.gather(
+            *(asyncio.to_thread(self._safe_ltp_call, ",".join(c)) for c in chunks),
+            return_exceptions=True)
+
+    @staticmethod
+    def _normalize_quotes(data, normalized_data):
+        """Copies quotes into normalized_data keyed by | (pipe) instrument keys, as used internally."""
+        for key, val in data.items():
+            # str.replace, not str.translate: for a single-char swap it is ~20x faster in CPython
+            # and returns the same string, unallocated, when there is no ':' (usual for tokens)
+            norm_key = key.replace(':', '|')
+            # The token is what callers request by, so a symbol key never overwrites a token entry
+            normalized_data.setdefault(norm_key, val)
+            
+            # Only add the token when it differs from the key
+            token = getattr(val, 'instrument_token', None)
+            if token:
+                norm_token = token.replace(':', '|')
+                if norm_token != norm_key:
+                    normalized_data[norm_token] = val
+
+    def start_feed(self, instrument_keys):
+        """
+        Stream exactly instrument_keys from the Upstox market data WebSocket (LTPC mode).
+        Ticks land in _ltp_store; get_spot_price / get_option_chain_quotes use them while fresh.
+        The SDK runs the socket on its own background thread. Calling again syncs the subscription:
+        new keys are subscribed and keys no longer listed (e.g. after an expiry roll) are unsubscribed.
+        """
+        if self._disabled or not instrument_keys:
+            return False
+        wanted = set(instrument_keys)
+        added = [k for k in dict.fromkeys(instrument_keys) if k not in self._feed_keys]
+        dropped = list(self._feed_keys - wanted)
+        try:
+            if self._feed is None:
+                streamer_cls = getattr(upstox_client, 'MarketDataStreamerV3', None)
+                if streamer_cls is None:
+                    print("WebSocket feed unavailable in this upstox-python-sdk; using REST polling.")
+                    return False
+                feed = streamer_cls(self.api_client, added, 'ltpc')
+                feed.on('message', self._on_feed_message)
+                feed.on('error', lambda error: print(f"Market feed error: {error}"))
+                feed.connect()
+                self._feed = feed
+            else:
+                if dropped:
+                    self._feed.unsubscribe(dropped)
+                    for key in dropped:
+                        self._ltp_store.pop(key, None)
+                if added:
+                    self._feed.subscribe(added, 'ltpc')
+            self._feed_keys = wanted
+            return True
+        except Exception as e:
+            print(f"Error starting market feed: {e}")
+            return False
+
+    def stop_feed(self):
+        """Disconnects the WebSocket feed; quotes go back to REST once the stored ticks age out."""
+        if self._feed is not None:
+            try:
+                self._feed.disconnect()
+            except Exception as e:
+                print(f"Error stopping market feed: {e}")
+            self._feed = None
+        self._feed_keys.clear()
+        self._ltp_store.clear()
+
+    def _on_feed_message(self, message):
+        """Feed callback (runs on the socket thread): records the LTP of every instrument in the tick."""
+        now = time.monotonic()
+        store = self._ltp_store
+        for key, feed in message.get('feeds', {}).items():
+            ltpc = feed.get('ltpc') or feed.get('fullFeed', {}).get('marketFF', {}).get('ltpc')
+            if ltpc and 'ltp' in ltpc:
+                store[key] = (now, float(ltpc['ltp']))
+
+    def _feed_ltp(self, instrument_key, now):
+        """Streamed LTP for instrument_key, or None when absent or older than _feed_max_age."""
+        hit = self._ltp_store.get(instrument_key)
+        if hit and now - hit[0] <= self._feed_max_age:
+            return hit[1]
+        return None
+
     def search_instruments(self, query):
         """
         Search for instruments to find keys.
@@ -140,20 +483,25 @@ class UpstoxWrapper:
         transaction_type: 'BUY' or 'SELL'
         product: 'D' (Delivery) or 'I' (Intraday)
         """
-        body = upstox_client.PlaceOrderRequest(
-            quantity=quantity,
-            product=config.ORDER_PRODUCT,
-            validity=config.ORDER_VALIDITY,
-            price=0.0,
-            tag=config.ORDER_TAG_PREFIX,
-            instrument_token=instrument_key,
-            order_type=order_type,
-            transaction_type=transaction_type,
-            disclosed_quantity=0,
-            trigger_price=0.0,
-            is_amo=False
-        )
+        if self._disabled:
+            print("CRITICAL ERROR: Order placement refused - no Upstox access token configured")
+            return {'status': 'error', 'message': 'No access token'}
         try:
+            self._wait_for_rate_limit('order')
+            # Margin changes once the order goes in
+            self._funds_cache = None
+            if self._http is not None:
+                order = dict(self._order_defaults, quantity=quantity, instrument_token=instrument_key,
+                             order_type=order_type, transaction_type=transaction_type)
+                payload = self._post(_ORDER_URL, json=order)
+                if payload.get('status') == 'success':
+                    return {'status': 'success', 'data': payload.get('data')}
+                return {'status': 'error', 'message': payload.get('message', 'Unknown API Error')}
+            body = copy.copy(self._order_template)
+            body.quantity = quantity
+            body.instrument_token = instrument_key
+            body.order_type = order_type
+            body.transaction_type = transaction_type
             api_response = self.order_api.place_order(body, api_version='2.0')
             if api_response.status == 'success':
                 return {'status': 'success', 'data': api_response.data}
@@ -161,13 +509,13 @@ class UpstoxWrapper:
                 return {'status': 'error', 'message': getattr(api_response, 'message', 'Unknown API Error')}
         except ApiException as e:
             # Handle specific Upstox error messages
-            import json
             error_msg = str(e)
-            try:
-                err_data = json.loads(e.body)
-                error_msg = err_data.get('errors', [{}])[0].get('message', str(e))
-            except:
-                pass
+            err_body = getattr(e, 'body', None)
+            if err_body:
+                try:
+                    error_msg = _json_loads(err_body).get('errors', [{}])[0].get('message', error_msg)
+                except (KeyError, IndexError, ValueError, TypeError, AttributeError):
+                    pass
             print(f"CRITICAL ERROR: Order placement failed - {error_msg}")
             return {'status': 'error', 'message': error_msg}
         except Exception as e:
@@ -177,9 +525,30 @@ class UpstoxWrapper:
     def get_funds(self):
         """
         Get available margin/funds for the user.
+        Repeat calls within _funds_ttl are served from an in-process cache.
         """
+        if self._disabled:
+            return 0.0
+        now = time.monotonic()
+        if self._funds_cache and now - self._funds_cache[0] < self._funds_ttl:
+            return self._funds_cache[1]
+        funds = self._fetch_funds()
+        if funds is None:
+            return 0.0
+        self._funds_cache = (now, funds)
+        return funds
+
+    def _fetch_funds(self):
+        """Returns available margin, or None if it could not be fetched."""
         try:
-            self._wait_for_rate_limit()
+            self._wait_for_rate_limit('user')
+            if self._http is not None:
+                payload = self._get('/user/get-funds-and-margin')
+                if payload.get('status') == 'success':
+                    equity = (payload.get('data') or {}).get('equity')
+                    if equity:
+                        return equity.get('available_margin', 0.0)
+                return None
             api_response = self.user_api.get_user_fund_margin(api_version='2.0')
             if api_response.status == 'success':
                 # Upstox SDK returns objects. 
@@ -191,4 +560,4 @@ class UpstoxWrapper:
                         return getattr(equity, 'available_margin', 0.0)
         except Exception as e:
             print(f"Error fetching funds: {e}")
-        return 0.0
+        return None
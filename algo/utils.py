@@ -1,35 +1,140 @@
+import math
+import os
 import numpy as np
-from scipy.stats import norm
+from scipy.optimize import brentq
+from scipy.special import ndtr
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # Kernels below run as plain Python
+
+# Numba is optional; USE_NUMBA=0 forces the pure-Python path even when it is installed
+_NUMBA_ENABLED = njit is not None and os.getenv('USE_NUMBA', '1') == '1'
+
+def _jit(fn):
+    return njit(cache=True, fastmath=True)(fn) if _NUMBA_ENABLED else fn
+
+try:
+    from _bs_core import implied_vol as _implied_vol_c
+except ImportError:
+    _implied_vol_c = None  # Extension not built (see setup.py)
+
+_SQRT2 = math.sqrt(2.0)
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+def _ncdf(x):
+    # Standard normal CDF; erfc keeps precision in the negative tail
+    return 0.5 * math.erfc(-x / _SQRT2)
 
 def black_scholes_price(flag, S, K, t, r, sigma):
     # Clamp sigma to prevent overflow (max ~10 = 1000% IV)
-    sigma = np.clip(sigma, 0.001, 10.0)
+    sigma = min(max(sigma, 0.001), 10.0)
     if t <= 0:
         t = 0.0001
     
-    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
-    d2 = d1 - sigma * np.sqrt(t)
+    sqrt_t = math.sqrt(t)
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
     
     if flag == 'c':
-        price = S * norm.cdf(d1) - K * np.exp(-r * t) * norm.cdf(d2)
+        price = S * _ncdf(d1) - K * math.exp(-r * t) * _ncdf(d2)
     else:
-        price = K * np.exp(-r * t) * norm.cdf(-d2) - S * norm.cdf(-d1)
+        price = K * math.exp(-r * t) * _ncdf(-d2) - S * _ncdf(-d1)
     
     return price
 
-def _vega(S, K, t, r, sigma):
-    # Clamp sigma to prevent overflow
-    sigma = np.clip(sigma, 0.001, 10.0)
+def _bs_price_cached(flag, S, disc_k, sqrt_t, sigma, log_fwd):
+    """
+    black_scholes_price for solver loops, from per-option invariants computed once:
+    disc_k = K*exp(-r*t), sqrt_t = sqrt(t), log_fwd = log(S/K) + r*t. Sigma is not clamped.
+    """
+    sig_t = sigma * sqrt_t
+    d1 = log_fwd / sig_t + 0.5 * sig_t
+    d2 = d1 - sig_t
+    if flag == 'c':
+        return S * _ncdf(d1) - disc_k * _ncdf(d2)
+    return disc_k * _ncdf(-d2) - S * _ncdf(-d1)
+
+# Numba kernels: math-only, with a bool call flag instead of 'c'/'p' so they type-check under njit
+@_jit
+def _ncdf_nb(x):
+    return 0.5 * math.erfc(-x / 1.4142135623730951)
+
+@_jit
+def _npdf_nb(x):
+    return 0.3989422804014327 * math.exp(-0.5 * x * x)
+
+@_jit
+def _bs_price_and_vega_cached_nb(flag_is_call, S, disc_k, sqrt_t, sigma, log_fwd):
+    # Fused price and vega from loop invariants, as in _bs_price_cached
+    sig_t = sigma * sqrt_t
+    d1 = log_fwd / sig_t + 0.5 * sig_t
+    d2 = d1 - sig_t
+    if flag_is_call:
+        price = S * _ncdf_nb(d1) - disc_k * _ncdf_nb(d2)
+    else:
+        price = disc_k * _ncdf_nb(-d2) - S * _ncdf_nb(-d1)
+    return price, S * _npdf_nb(d1) * sqrt_t
+
+@_jit
+def _iv_seed(price, S, K, t, r, flag_is_call):
+    """Corrado-Miller starting IV (Brenner-Subrahmanyam at the money), clamped to [0.01, 3.0]."""
+    disc_k = K * math.exp(-r * t)
+    gap = S - disc_k
+    # The approximation is for calls; puts convert via put-call parity
+    call = price if flag_is_call else price + gap
+    half_gap = call - 0.5 * gap
+    root = math.sqrt(max(half_gap * half_gap - gap * gap / math.pi, 0.0))
+    sigma = math.sqrt(2.0 * math.pi / t) / (S + disc_k) * (half_gap + root)
+    return min(max(sigma, 0.01), 3.0)
+
+@_jit
+def calculate_iv_nb(price, S, K, t, r, flag_is_call):
+    """Newton-Raphson IV kernel; same rules as calculate_implied_volatility."""
     if t <= 0:
-        t = 0.0001
-    
-    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
-    return S * norm.pdf(d1) * np.sqrt(t)
+        return 0.001
+    intrinsic = max(S - K, 0.0) if flag_is_call else max(K - S, 0.0)
+    if price < intrinsic:
+        return 0.001
+    disc_k = K * math.exp(-r * t)
+    # No-arbitrage bounds, as in calculate_implied_volatility
+    if flag_is_call:
+        lower, upper = max(S - disc_k, 0.0), S
+    else:
+        lower, upper = max(disc_k - S, 0.0), disc_k
+    if price <= lower:
+        return 0.001
+    if price >= upper:
+        return 10.0
+    sigma = _iv_seed(price, S, K, t, r, flag_is_call)
+    # Loop invariants: each step is then arithmetic, two erfc and one exp
+    sqrt_t = math.sqrt(t)
+    log_fwd = math.log(S / K) + r * t
+    for i in range(100):
+        bs_price, v = _bs_price_and_vega_cached_nb(flag_is_call, S, disc_k, sqrt_t, sigma, log_fwd)
+        diff = price - bs_price
+        if abs(diff) < 1e-5:
+            return sigma
+        if v == 0:
+            break
+        sigma = min(max(sigma + diff / v, 0.001), 10.0)
+    return sigma
 
 def calculate_implied_volatility(price, S, K, t, r, flag='p'):
     """
-    Calculate Implied Volatility (IV) using Newton-Raphson method.
+    Calculate Implied Volatility (IV).
+    Backends, first available wins: the compiled _bs_core extension, then the Numba kernel
+    (on by default; USE_NUMBA=0 disables it), both Newton-Raphson, then Brent's method in
+    pure Python. In a normal install with numba the Numba kernel is the production path.
+    All backends return 0.001 at or below the no-arbitrage lower bound and 10.0 at or above the upper one.
     """
+    if _implied_vol_c is not None:
+        return _implied_vol_c(float(price), float(S), float(K), float(t), float(r), flag == 'c')
+
+    if _NUMBA_ENABLED:
+        return calculate_iv_nb(float(price), float(S), float(K), float(t), float(r), flag == 'c')
+
     if t <= 0:
         return 0.001
     
@@ -42,26 +147,139 @@ def calculate_implied_volatility(price, S, K, t, r, flag='p'):
         
     if price < intrinsic:
         return 0.001
+
+    # No-arbitrage bounds: no volatility prices an option at or below its discounted intrinsic value,
+    # and none reaches S (call) or K*exp(-r*t) (put). Checked up front so every backend returns the same end.
+    disc_k = K * math.exp(-r * t)
+    if flag == 'c':
+        lower, upper = max(S - disc_k, 0.0), S
+    else:
+        lower, upper = max(disc_k - S, 0.0), disc_k
+    if price <= lower:
+        return 0.001
+    if price >= upper:
+        return 10.0
         
-    # Initial Guess
-    sigma = 0.5
-    
-    # Newton-Raphson
+    # Bracketed root find: no vega needed and no divergence when vega -> 0 deep ITM/OTM.
+    # The bracket is [0.001, 10.0], the same clamp as black_scholes_price and the Newton-Raphson paths.
+    sqrt_t = math.sqrt(t)
+    log_fwd = math.log(S / K) + r * t
+
+    def objective(sigma):
+        return _bs_price_cached(flag, S, disc_k, sqrt_t, sigma, log_fwd) - price
+
+    try:
+        # disp=False: an unconverged run still returns its best bracketed estimate
+        return brentq(objective, 0.001, 10.0, xtol=1e-5, maxiter=50, disp=False)
+    except ValueError:
+        # No sign change: the price is beyond one end of the bracket, so return the end it crossed
+        return 10.0 if objective(10.0) < 0 else 0.001
+
+def calculate_implied_volatility_vec(prices, S, K, t, r, flags):
+    """
+    Vectorized Newton-Raphson IV for a whole option chain.
+    prices, K, t and flags ('c'/'p') are per-strike arrays; S and r may be scalars.
+    Returns an ndarray of IVs with the same rules as calculate_implied_volatility.
+    """
+    # Contiguous float64 copies made once, so the per-iteration gathers and ufuncs stream through memory
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    shape = prices.shape
+
+    def _full(x, dtype=np.float64):
+        return np.ascontiguousarray(np.broadcast_to(np.asarray(x, dtype=dtype), shape))
+
+    S = _full(S)
+    K = _full(K)
+    t_raw = _full(t)
+    r = _full(r)
+    is_call = _full(np.asarray(flags) == 'c', dtype=bool)
+    # +1 for calls, -1 for puts: both prices come from sign * (S*N(sign*d1) - K*disc*N(sign*d2))
+    sign = np.where(is_call, 1.0, -1.0)
+
+    # Expired or below-intrinsic quotes get the same 0.001 floor as the scalar solver
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    active = (t_raw > 0) & (prices >= intrinsic)
+
+    t = np.maximum(t_raw, 0.0001)
+    sqrt_t = np.sqrt(t)
+    log_sk = np.log(S / K)
+    disc_k = K * np.exp(-r * t)
+
+    # No-arbitrage bounds, as in the scalar solver: 0.001 at or below the lower, 10.0 at or above the upper
+    above = active & (prices >= np.where(is_call, S, disc_k))
+    active &= (prices > np.maximum(sign * (S - disc_k), 0.0)) & ~above
+
+    # Corrado-Miller warm start, as in _iv_seed
+    gap = S - disc_k
+    half_gap = np.where(is_call, prices, prices + gap) - 0.5 * gap
+    seed = np.sqrt(2.0 * np.pi / t) / (S + disc_k) * (half_gap + np.sqrt(np.maximum(half_gap ** 2 - gap ** 2 / np.pi, 0.0)))
+    sigma = np.where(active, np.clip(seed, 0.01, 3.0), np.where(above, 10.0, 0.001))
+
+    # Newton-Raphson over the rows that have not converged yet
     for i in range(100):
-        bs_price = black_scholes_price(flag, S, K, t, r, sigma)
-        diff = price - bs_price
-        
-        if abs(diff) < 1e-5:
-            return sigma
-            
-        v = _vega(S, K, t, r, sigma)
-        
-        if v == 0:
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
             break
-            
-        sigma = sigma + diff / v
-        
+        sig = sigma[idx]
+        st = sqrt_t[idx]
+        d1 = (log_sk[idx] + (r[idx] + 0.5 * sig ** 2) * t[idx]) / (sig * st)
+        d2 = d1 - sig * st
+        s_i = S[idx]
+        dk_i = disc_k[idx]
+        sg = sign[idx]
+        bs_price = sg * (s_i * ndtr(sg * d1) - dk_i * ndtr(sg * d2))
+        diff = prices[idx] - bs_price
+        v = s_i * _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1) * st
+
+        step = (np.abs(diff) >= 1e-5) & (v != 0)
         # Clamp sigma during iterations to prevent overflow
-        sigma = np.clip(sigma, 0.001, 10.0)
-        
+        sigma[idx[step]] = np.clip(sig[step] + diff[step] / v[step], 0.001, 10.0)
+        active[idx[~step]] = False
+
     return sigma
+
+# IV memo for chain polling: most strikes' LTPs do not move between ticks
+_iv_cache = {}
+_IV_CACHE_MAXSIZE = 10000
+_MINUTES_PER_YEAR = 365 * 24 * 60
+
+def _iv_cache_key(instrument_key, price, S, t, flag):
+    # Spot bucketed to 0.25 points; t is in years, bucketed to whole minutes
+    return (instrument_key, round(price, 2), round(S / 0.25), round(t * _MINUTES_PER_YEAR), flag)
+
+def calculate_implied_volatility_vec_cached(instrument_keys, prices, S, K, t, r, flags):
+    """
+    calculate_implied_volatility_vec memoized per contract (instrument_key).
+    The key is the LTP to 2dp, spot bucketed to 0.25 and time to expiry to 1 minute, so a strike
+    whose LTP has not moved is a cache hit. S and r are scalars; only the misses go through one
+    vectorized solve. Returns an ndarray.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n = prices.shape[0]
+    K = np.broadcast_to(np.asarray(K, dtype=np.float64), (n,))
+    t = np.broadcast_to(np.asarray(t, dtype=np.float64), (n,))
+    flags = np.broadcast_to(np.asarray(flags), (n,))
+
+    ivs = np.empty(n, dtype=np.float64)
+    keys = [_iv_cache_key(k, p, S, tt, f)
+            for k, p, tt, f in zip(instrument_keys, prices.tolist(), t.tolist(), flags.tolist())]
+    miss = []
+    for i, key in enumerate(keys):
+        iv = _iv_cache.get(key)
+        if iv is None:
+            miss.append(i)
+        else:
+            ivs[i] = iv
+
+    if miss:
+        solved = calculate_implied_volatility_vec(prices[miss], S, K[miss], t[miss], r, flags[miss])
+        ivs[miss] = solved
+        for i, iv in zip(miss, solved.tolist()):
+            _iv_cache_put(keys[i], iv)
+    return ivs
+
+def _iv_cache_put(key, iv):
+    if len(_iv_cache) >= _IV_CACHE_MAXSIZE:
+        # FIFO eviction: dicts keep insertion order
+        del _iv_cache[next(iter(_iv_cache))]
+    _iv_cache[key] = iv
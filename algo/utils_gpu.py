@@ -0,0 +1,73 @@
+import math
+import numpy as np
+
+try:
+    import torch
+except ImportError:
+    torch = None  # GPU backend unavailable; use utils.calculate_implied_volatility_vec
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+def iv_torch(price, S, K, t, r, flag, device='cuda', dtype=None):
+    """
+    Chain-wide Newton-Raphson IV on a PyTorch device.
+    Same inputs and rules as utils.calculate_implied_volatility_vec; returns an ndarray.
+    Falls back to CPU when CUDA is not available.
+    """
+    if torch is None:
+        raise ImportError("iv_torch requires PyTorch")
+    if device == 'cuda' and not torch.cuda.is_available():
+        device = 'cpu'
+    dtype = dtype or torch.float64
+
+    price_np = np.asarray(price, dtype=np.float64)
+    shape = price_np.shape
+
+    def _tensor(x):
+        return torch.as_tensor(np.broadcast_to(np.asarray(x, dtype=np.float64), shape).copy(), dtype=dtype, device=device)
+
+    price = _tensor(price_np)
+    S = _tensor(S)
+    K = _tensor(K)
+    t_raw = _tensor(t)
+    r = _tensor(r)
+    is_call = torch.as_tensor(np.broadcast_to(np.asarray(flag) == 'c', shape).copy(), device=device)
+    sign = torch.where(is_call, 1.0, -1.0).to(dtype)
+
+    # Expired or below-intrinsic quotes get the 0.001 floor
+    intrinsic = torch.clamp(sign * (S - K), min=0.0)
+    active = (t_raw > 0) & (price >= intrinsic)
+
+    t = torch.clamp(t_raw, min=0.0001)
+    sqrt_t = torch.sqrt(t)
+    log_sk = torch.log(S / K)
+    disc_k = K * torch.exp(-r * t)
+
+    # No-arbitrage bounds: 0.001 at or below the lower, 10.0 at or above the upper
+    above = active & (price >= torch.where(is_call, S, disc_k))
+    active = active & (price > torch.clamp(sign * (S - disc_k), min=0.0)) & ~above
+
+    # Corrado-Miller warm start (puts via put-call parity)
+    gap = S - disc_k
+    half_gap = torch.where(is_call, price, price + gap) - 0.5 * gap
+    seed = torch.sqrt(2.0 * math.pi / t) / (S + disc_k) * (
+        half_gap + torch.sqrt(torch.clamp(half_gap ** 2 - gap ** 2 / math.pi, min=0.0)))
+    sigma = torch.where(active, torch.clamp(seed, 0.01, 3.0),
+                        torch.where(above, torch.full_like(seed, 10.0), torch.full_like(seed, 0.001)))
+
+    # Whole-tensor Newton-Raphson steps; converged rows are frozen by the mask instead of gathered out
+    for i in range(100):
+        if not bool(active.any()):
+            break
+        d1 = (log_sk + (r + 0.5 * sigma ** 2) * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        bs_price = sign * (S * torch.special.ndtr(sign * d1) - disc_k * torch.special.ndtr(sign * d2))
+        diff = price - bs_price
+        v = S * torch.exp(-0.5 * d1 * d1) * _INV_SQRT_2PI * sqrt_t
+
+        step = active & (diff.abs() >= 1e-5) & (v != 0)
+        # Clamp sigma during iterations to prevent overflow
+        sigma = torch.where(step, torch.clamp(sigma + diff / v, 0.001, 10.0), sigma)
+        active = step
+
+    return sigma.cpu().numpy()